@@ -0,0 +1,325 @@
+# Single-pass aggregation of the filtered rows.
+#
+# Every KPI and every chart table is computed here in one go: each column the
+# dashboard needs is read once, turned into integer codes, and counted with
+# np.bincount. The terminated-rows mask is built once and shared by the
+# attrition and termination-reason tables. The output renderers in main.py
+# only format what summarize() returns.
+#
+# Numeric fields get histograms over fixed-width bins (HISTOGRAM_BINS). A
+# value's bin is a plain integer, floor(value / width), so bins line up
+# across filters, cube cells and appended rows, and a histogram is one
+# bincount of those integers.
+
+import numpy as np
+import pandas as pd
+
+HIGH_PERFORMER_SCORES = ["Exceeds", "Fully Meets"]
+PERF_SCORE_MAP = {'Exceeds': 4, 'Fully Meets': 3, 'Needs Improvement': 2, 'PIP': 1}
+
+
+def codes_of(series):
+    # Integer codes plus the matching labels; free for categorical columns
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return np.asarray(series.array.codes), np.asarray(series.cat.categories, dtype=object)
+    codes, uniques = pd.factorize(series)
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def bincount(codes, n, mask=None, weights=None):
+    # np.bincount that skips missing (-1) codes and an optional row mask
+    keep = codes >= 0
+    if mask is not None:
+        keep &= mask
+    return np.bincount(codes[keep], weights=None if weights is None else weights[keep], minlength=n)
+
+
+# Column -> bin width
+HISTOGRAM_BINS = {"Salary": 5000, "Absences": 1, "EngagementSurvey": 0.25, "TenureYears": 1}
+
+
+def bin_codes(series, width):
+    # Codes into the sorted bins present, plus those bins; missing and
+    # negative values (TenureYears -1 = still employed) get -1
+    values = series.to_numpy(dtype=float)
+    ok = values >= 0
+    bins = np.floor(values[ok] / width).astype(np.int64)
+    labels, present = np.unique(bins, return_inverse=True)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[ok] = present
+    return codes, labels
+
+
+def month_codes(dates, mask=None):
+    # Codes into the sorted calendar months present (datetime64[M] labels);
+    # missing dates and rows outside mask get -1
+    months = np.asarray(dates.to_numpy(), dtype="datetime64[M]")
+    ok = ~np.isnat(months)
+    if mask is not None:
+        ok &= mask
+    labels, present = np.unique(months[ok], return_inverse=True)
+    codes = np.full(len(months), -1, dtype=np.int64)
+    codes[ok] = present
+    return codes, labels
+
+
+def tenure_label(years):
+    if years < 1: return "< 1 Year"
+    elif years == 1: return "1 Year"
+    else: return f"{years} Years"
+
+
+# --- Chart tables (shared with the cube so both paths build identical frames) ---
+
+def count_table(labels, counts, label_col, top=None):
+    keep = counts > 0
+    table = pd.DataFrame({label_col: labels[keep], 'Count': counts[keep].astype(np.int64)})
+    table = table.sort_values(['Count', label_col], ascending=[False, True], ignore_index=True)
+    return table if top is None else table.head(top)
+
+
+def tenure_table(years, counts):
+    # Sort numerically so the x-axis is 0, 1, 2, 3...
+    keep = counts > 0
+    years = years[keep].astype(int)
+    return pd.DataFrame({
+        'YearsInt': years,
+        'Count': counts[keep].astype(np.int64),
+        'Label': [tenure_label(y) for y in years],
+    })
+
+
+def bin_totals(series, width):
+    codes, bins = bin_codes(series, width)
+    return bins, bincount(codes, len(bins))
+
+
+def histogram_table(bins, counts, width):
+    # Every bin from the first to the last non-empty one, so gaps show as zeros
+    keep = counts > 0
+    if not keep.any():
+        return None
+    bins, counts = bins[keep], counts[keep]
+    all_bins = np.arange(bins.min(), bins.max() + 1)
+    full = np.zeros(len(all_bins), dtype=np.int64)
+    full[bins - bins.min()] = counts
+    return pd.DataFrame({'Bin': all_bins * width, 'Count': full})
+
+
+def trend_table(hire_months, hires, term_months, terms):
+    # Monthly hires, terminations, end-of-month headcount and attrition rate
+    # (terminations / average headcount) from the event counts per month.
+    # Headcount is a running sum of hires minus terminations, so the cost
+    # depends on the number of months, not of employees.
+    keep_hires, keep_terms = hires > 0, terms > 0
+    if not keep_hires.any():
+        return None
+    hire_months, hires = hire_months[keep_hires], hires[keep_hires]
+    term_months, terms = term_months[keep_terms], terms[keep_terms]
+    events = np.concatenate([hire_months, term_months])
+    first, last = events.min(), events.max()
+    months = np.arange(first, last + 1)
+    hired = np.zeros(len(months), dtype=np.int64)
+    hired[(hire_months - first).astype(np.int64)] = hires
+    left = np.zeros(len(months), dtype=np.int64)
+    left[(term_months - first).astype(np.int64)] = terms
+    headcount = np.cumsum(hired - left)
+    average = (2 * headcount - hired + left) / 2  # mean of start and end of month
+    rate = np.full(len(months), np.nan)
+    np.divide(left, average, out=rate, where=average > 0)
+    return pd.DataFrame({
+        'Month': months.astype("datetime64[ns]"),
+        'Hires': hired,
+        'Terminations': left,
+        'Headcount': headcount,
+        'AttritionRate': rate,
+    })
+
+
+def recruitment_table(src_labels, status_labels, pair_counts):
+    # pair_counts is a (sources x statuses) matrix
+    src_idx, status_idx = np.nonzero(pair_counts)
+    table = pd.DataFrame({
+        'RecruitmentSource': src_labels[src_idx],
+        'EmploymentStatus': status_labels[status_idx],
+        'Count': pair_counts[src_idx, status_idx].astype(np.int64),
+    })
+    return table.sort_values(['RecruitmentSource', 'EmploymentStatus'], ignore_index=True)
+
+
+def kpis(n_rows, active, terminated, engagement_mean, satisfaction_mean, high_performers):
+    return {
+        "n_rows": int(n_rows),
+        "active": int(active),
+        "terminated": int(terminated),
+        "engagement_mean": float(engagement_mean),
+        "satisfaction_mean": float(satisfaction_mean),
+        "high_performers": int(high_performers),
+    }
+
+
+def summarize(dff):
+    n = len(dff)
+    if n == 0:
+        return None
+
+    termd = dff['Termd'].to_numpy() == 1
+    status_codes, status_labels = codes_of(dff['EmploymentStatus'])
+    perf_codes, perf_labels = codes_of(dff['PerformanceScore'])
+    status_counts = bincount(status_codes, len(status_labels))
+    perf_counts = bincount(perf_codes, len(perf_labels))
+
+    summary = kpis(
+        n,
+        active=status_counts[status_labels == 'Active'].sum(),
+        terminated=np.count_nonzero(termd),
+        engagement_mean=np.nanmean(dff['EngagementSurvey'].to_numpy(dtype=float)),
+        satisfaction_mean=np.nanmean(dff['EmpSatisfaction'].to_numpy(dtype=float)),
+        high_performers=perf_counts[np.isin(perf_labels, HIGH_PERFORMER_SCORES)].sum(),
+    )
+    summary["perf_dist"] = count_table(perf_labels, perf_counts, 'Score')
+
+    # --- Terminated employees ---
+    if summary["terminated"]:
+        dept_codes, dept_labels = codes_of(dff['Department'])
+        summary["attrition_dept"] = count_table(
+            dept_labels, bincount(dept_codes, len(dept_labels), termd), 'Department'
+        )
+
+        reason_codes, reason_labels = codes_of(dff['TermReason'])
+        summary["term_reasons"] = count_table(
+            reason_labels, bincount(reason_codes, len(reason_labels), termd), 'Reason', top=10
+        )
+
+        summary["tenure"] = tenure_table(*bin_totals(dff['TenureYears'], 1))
+    else:
+        summary["attrition_dept"] = summary["term_reasons"] = summary["tenure"] = None
+
+    for col, width in HISTOGRAM_BINS.items():
+        summary[f"hist_{col}"] = histogram_table(*bin_totals(dff[col], width), width)
+
+    # --- Hires and terminations per month ---
+    hire_codes, hire_months = month_codes(dff['DateofHire'])
+    term_codes, term_months = month_codes(dff['DateofTermination'], termd)
+    summary["trend"] = trend_table(
+        hire_months, bincount(hire_codes, len(hire_months)), term_months, bincount(term_codes, len(term_months))
+    )
+
+    # --- Recruitment source x employment status ---
+    src_codes, src_labels = codes_of(dff['RecruitmentSource'])
+    pair = np.where(status_codes >= 0, src_codes * len(status_labels) + status_codes, -1)
+    pair_counts = bincount(pair, len(src_labels) * len(status_labels))
+    summary["recruitment"] = recruitment_table(
+        src_labels, status_labels, pair_counts.reshape(len(src_labels), len(status_labels))
+    )
+
+    # --- Manager effectiveness ---
+    # Map scores through the codes already computed above
+    summary["manager_stats"] = manager_means(dff, perf_numbers(perf_codes, perf_labels))
+    return summary
+
+
+# --- Managers ---
+# Sufficient statistics (headcount, sums and counts of the two scores) add
+# up across any split of the rows, so the cube keeps them per manager and
+# cell and answers every filter without touching rows.
+
+MANAGER_MEASURES = ["count", "perf_sum", "perf_n", "sat_sum", "sat_n"]
+
+
+def manager_sums(mgr_codes, k, perf_num, sat):
+    perf_ok, sat_ok = ~np.isnan(perf_num), ~np.isnan(sat)
+    return {
+        "count": bincount(mgr_codes, k),
+        "perf_sum": bincount(mgr_codes, k, perf_ok, np.nan_to_num(perf_num)),
+        "perf_n": bincount(mgr_codes, k, perf_ok),
+        "sat_sum": bincount(mgr_codes, k, sat_ok, np.nan_to_num(sat)),
+        "sat_n": bincount(mgr_codes, k, sat_ok),
+    }
+
+
+def manager_table(mgr_labels, sums):
+    # Mean performance / satisfaction per manager, ignoring missing values
+    present = np.flatnonzero(sums["count"])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stats = pd.DataFrame({
+            'ManagerName': mgr_labels[present],
+            'PerfScoreNum': sums["perf_sum"][present] / sums["perf_n"][present],
+            'EmpSatisfaction': sums["sat_sum"][present] / sums["sat_n"][present],
+            'Headcount': sums["count"][present].astype(np.int64),
+        })
+    # --- SORT BY PERFORMANCE THEN SATISFACTION ---
+    return stats.sort_values(
+        ['PerfScoreNum', 'EmpSatisfaction', 'ManagerName'],
+        ascending=[False, False, True], ignore_index=True
+    )
+
+
+def manager_means(dff, perf_num):
+    mgr_codes, mgr_labels = codes_of(dff['ManagerName'])
+    sat = dff['EmpSatisfaction'].to_numpy(dtype=float)
+    return manager_table(mgr_labels, manager_sums(mgr_codes, len(mgr_labels), perf_num, sat))
+
+
+def perf_numbers(perf_codes, perf_labels):
+    # PerformanceScore codes -> PERF_SCORE_MAP values (-1 and unknown -> NaN)
+    lookup = np.array([PERF_SCORE_MAP.get(l, np.nan) for l in perf_labels] + [np.nan])
+    return lookup[perf_codes]
+
+
+# --- Box plots ---
+
+def box_stats(dff, value_col, group_col, hover_cols=(), max_outliers=None):
+    # Per-group quartiles, whiskers and outlier rows, computed the way
+    # px.box(points="outliers") does in the browser: plotly.js's "linear"
+    # quartiles (interpolated at position q*n - 0.5), whiskers at the
+    # furthest points within 1.5 IQR of the box.
+    # Groups come out in order of first appearance, like px.box. At most
+    # max_outliers points are kept, the ones furthest outside the whiskers.
+    values = dff[value_col].to_numpy(dtype=float)
+    codes, labels = codes_of(dff[group_col])
+    rows = np.flatnonzero((codes >= 0) & ~np.isnan(values))
+    if len(rows) == 0:
+        return None
+    codes, values = codes[rows], values[rows]
+
+    present, first = np.unique(codes, return_index=True)
+    present = present[np.argsort(first)]
+    rank = np.empty(len(labels), dtype=np.intp)
+    rank[present] = np.arange(len(present))
+    group = rank[codes]
+
+    # Sort by (group, value) once; each group is then a contiguous run
+    order = np.lexsort((values, group))
+    ordered = values[order]
+    counts = np.bincount(group, minlength=len(present))
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    def quantile(q):
+        pos = starts + np.clip(q * counts - 0.5, 0, counts - 1)
+        lo = np.floor(pos).astype(np.intp)
+        hi = np.minimum(lo + 1, starts + counts - 1)
+        return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    low, high = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    inside = (ordered >= low[group[order]]) & (ordered <= high[group[order]])
+    boxes = pd.DataFrame({
+        group_col: labels[present],
+        'n': counts,
+        'q1': q1,
+        'median': median,
+        'q3': q3,
+        'lowerfence': np.minimum.reduceat(np.where(inside, ordered, np.inf), starts),
+        'upperfence': np.maximum.reduceat(np.where(inside, ordered, -np.inf), starts),
+    })
+
+    # --- Outliers: everything outside the whiskers ---
+    distance = np.maximum(low[group] - values, values - high[group])
+    outside = np.flatnonzero(distance > 0)
+    n_outliers = len(outside)
+    if max_outliers is not None and n_outliers > max_outliers:
+        outside = outside[np.argsort(-distance[outside], kind="stable")[:max_outliers]]
+        outside.sort()
+    outliers = dff.iloc[rows[outside]][[group_col, value_col, *hover_cols]].reset_index(drop=True)
+    return {"boxes": boxes, "outliers": outliers, "n_outliers": n_outliers}
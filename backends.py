@@ -0,0 +1,402 @@
+# Query backends behind the dashboard's KPIs and charts.
+#
+# main.py asks a backend for four things, always in terms of the sidebar
+# selections (column -> selected values, empty = all):
+#
+#   summarize(selections)      KPIs and chart tables (see aggregates.summarize)
+#   box_stats(selections, ...) box plot statistics (see aggregates.box_stats)
+#   rows(selections, columns)  the matching rows themselves
+#   choices(col)               values offered in the sidebar
+#   facets(selections)         per-value counts for the sidebar options
+#
+# PandasBackend (the default) answers from the in-memory HRStore: the cube
+# for summaries, the filter index for rows.
+#
+# DuckDBBackend (HR_BACKEND=duckdb) keeps nothing in memory and pushes every
+# question down as SQL to an embedded DuckDB over Parquet files, which runs
+# out-of-core and on all cores. One scan with GROUPING SETS returns every
+# count and sum a summary needs; the small grouped results go through the
+# same table builders as the pandas path, so both produce identical frames.
+# Files are read as they are at query time; results cached by main.py are
+# only dropped on restart.
+#
+#   python -m pytest tests/test_backends.py   # compare both backends on the dataset
+#
+# The Parquet files need the columns of data_loader.USE_COLUMNS (the CSV's
+# sidecar, a shared store build or synth_data.py output all qualify).
+
+import glob
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    HIGH_PERFORMER_SCORES, HISTOGRAM_BINS, PERF_SCORE_MAP, box_stats, count_table, histogram_table,
+    kpis, manager_table, recruitment_table, tenure_table, trend_table,
+)
+from cube import check_selection, facet_counts
+from data_loader import DATA_PATH, load_dataset, sidecar_paths
+
+
+class PandasBackend:
+    def __init__(self, store, cube_check=False):
+        self.store = store
+        self.cube_check = cube_check
+        # Row positions of the last selection: both box plots ask for the same one
+        self._last_rows = (None, None)
+        self._lock = threading.Lock()
+
+    def n_rows(self):
+        return len(self.store.current.df)
+
+    def summarize(self, selections):
+        snap = self.store.current
+        if snap.cube is None:
+            return None
+        stats = snap.cube.summarize(selections)
+        if self.cube_check:
+            check_selection(snap.cube, snap.df, snap.filter_index, selections)
+        return stats
+
+    def rows(self, selections, columns=None):
+        snap = self.store.current
+        if snap.df.empty:
+            return pd.DataFrame(columns=columns)
+        key = (snap.version, _freeze(selections))
+        with self._lock:
+            last_key, positions = self._last_rows
+        if last_key != key:
+            positions = snap.filter_index.positions(selections)
+            with self._lock:
+                self._last_rows = (key, positions)
+        # No active filters: hand out the shared frame as-is (never mutated)
+        dff = snap.df if positions is None else snap.df.take(positions)
+        return dff if columns is None else dff[columns]
+
+    def box_stats(self, selections, value_col, group_col, hover_cols=(), max_outliers=None):
+        dff = self.rows(selections)
+        if dff.empty:
+            return None
+        return box_stats(dff, value_col, group_col, hover_cols, max_outliers)
+
+    def choices(self, col):
+        data = self.store.current.df
+        if data.empty:
+            return []
+        return sorted(list(data[col].dropna().unique()))
+
+    def facets(self, selections):
+        cube = self.store.current.cube
+        return {} if cube is None else cube.facets(selections)
+
+
+def _freeze(selections):
+    return tuple(sorted((col, tuple(values)) for col, values in selections.items()))
+
+
+# --- DuckDB ---
+
+def default_parquet_source(csv_path=DATA_PATH):
+    # The CSV's typed sidecar, written by load_dataset() if it isn't there yet
+    sidecar, _ = sidecar_paths(csv_path)
+    if not sidecar.exists():
+        load_dataset(csv_path)
+    return str(sidecar)
+
+
+class DuckDBBackend:
+    # Grouping columns of the summary scan (see _summary_sql)
+    SUMMARY_GROUPS = {
+        "status": ["EmploymentStatus"],
+        "perf": ["PerformanceScore"],
+        "dept": ["Department"],
+        "reason": ["TermReason"],
+        "recruitment": ["RecruitmentSource", "EmploymentStatus"],
+        "manager": ["ManagerName"],
+        **{f"hist_{col}": [f"bin_{col}"] for col in HISTOGRAM_BINS},
+        "hires": ["_hire_month"],
+        "terminations": ["_term_month"],
+    }
+
+    def __init__(self, source, threads=None, memory_limit=None):
+        # Imported here, not at the top: the pandas backend never needs it
+        try:
+            import duckdb
+        except ImportError:
+            raise RuntimeError("HR_BACKEND=duckdb needs the duckdb package") from None
+        self.files = sorted(glob.glob(str(source))) if not Path(source).is_dir() \
+            else sorted(glob.glob(str(Path(source) / "*.parquet")))
+        if not self.files:
+            raise FileNotFoundError(f"No Parquet files at {source}")
+        self.con = duckdb.connect()
+        if threads:
+            self.con.execute(f"SET threads = {int(threads)}")
+        if memory_limit:
+            self.con.execute("SET memory_limit = ?", [memory_limit])
+        self.con.execute(self._view_sql())
+        self._n_rows = self._query("SELECT count(*) FROM hr")[0][0]
+        self._summary = self._summary_sql()
+        self._cells = {}  # filter dimensions -> (cells, counts), see facets()
+
+    def _view_sql(self):
+        files = "[" + ", ".join(_literal(f) for f in self.files) + "]"
+        # _pos: position of the row in the files taken in order, so "first
+        # appearance" and row order mean the same as in the concatenated frame
+        if len(self.files) == 1:
+            pos = "file_row_number"
+        else:
+            counts = dict(self.con.execute(f"SELECT file_name, num_rows FROM parquet_file_metadata({files})").fetchall())
+            offsets, start = [], 0
+            for f in self.files:
+                offsets.append(f"WHEN {_literal(f)} THEN {start}")
+                start += counts[f]
+            pos = f"file_row_number + CASE filename {' '.join(offsets)} END"
+        # Same definition as data_loader.tenure_years()
+        tenure = ("CASE WHEN Termd = 1 AND trunc(date_diff('day', DateofHire, DateofTermination) / 365) >= 0 "
+                  "THEN trunc(date_diff('day', DateofHire, DateofTermination) / 365) END")
+        return (f"CREATE VIEW hr AS SELECT * EXCLUDE (file_row_number, filename), {pos} AS _pos, "
+                f"{tenure} AS _TenureYears "
+                f"FROM read_parquet({files}, filename = true, file_row_number = true)")
+
+    def _summary_sql(self):
+        def number(col):
+            return "_TenureYears" if col == "TenureYears" else f"CAST({col} AS DOUBLE)"
+
+        # Bin = floor(value / width) for values >= 0, as in aggregates.bin_codes
+        bins = ", ".join(
+            f"CASE WHEN {number(col)} >= 0 AND NOT isnan({number(col)}) "
+            f"THEN floor({number(col)} / {float(width)!r}) END AS bin_{col}"
+            for col, width in HISTOGRAM_BINS.items()
+        )
+        # Calendar months as months since 1970-01 (datetime64[M] in numpy)
+        def month(col):
+            return f"(year({col}) - 1970) * 12 + month({col}) - 1"
+
+        months = (f"{month('DateofHire')} AS _hire_month, "
+                  f"CASE WHEN Termd = 1 THEN {month('DateofTermination')} END AS _term_month")
+        perf = "CASE PerformanceScore " + " ".join(
+            f"WHEN {_literal(label)} THEN {value}" for label, value in PERF_SCORE_MAP.items()
+        ) + " END"
+        self.group_columns = list(dict.fromkeys(c for cols in self.SUMMARY_GROUPS.values() for c in cols))
+        sets = ", ".join("(" + ", ".join(cols) + ")" for cols in self.SUMMARY_GROUPS.values())
+        return f"""
+            WITH rows AS (
+                SELECT *, {bins}, {months}, {perf} AS _perf FROM hr WHERE {{where}}
+            )
+            SELECT
+                GROUPING_ID({", ".join(self.group_columns)}) AS _gid,
+                {", ".join(self.group_columns)},
+                count(*) AS n,
+                count(*) FILTER (WHERE Termd = 1) AS terminated,
+                sum(EngagementSurvey) FILTER (WHERE NOT isnan(EngagementSurvey)) AS engagement_sum,
+                count(*) FILTER (WHERE NOT isnan(EngagementSurvey)) AS engagement_n,
+                sum(EmpSatisfaction) AS satisfaction_sum,
+                count(EmpSatisfaction) AS satisfaction_n,
+                sum(_perf) AS perf_sum,
+                count(_perf) AS perf_n
+            FROM rows
+            GROUP BY GROUPING SETS ((), {sets})
+        """
+
+    def _query(self, sql, params=()):
+        # A cursor per query: sessions may call in from several threads
+        with self.con.cursor() as cur:
+            return cur.execute(sql, list(params)).fetchall()
+
+    def _frame(self, sql, params=()):
+        with self.con.cursor() as cur:
+            return cur.execute(sql, list(params)).df()
+
+    def n_rows(self):
+        return self._n_rows
+
+    # --- Queries ---
+
+    def summarize(self, selections):
+        where, params = _where(selections)
+        result = self._frame(self._summary.format(where=where), params)
+        n_cols = len(self.group_columns)
+
+        def group(name):
+            # Rows of one grouping set, without NULL keys (pandas codes -1)
+            cols = self.SUMMARY_GROUPS[name]
+            gid = sum(1 << (n_cols - 1 - i) for i, c in enumerate(self.group_columns) if c not in cols)
+            rows = result[result["_gid"] == gid]
+            return rows[rows[cols].notna().all(axis=1)]
+
+        total = result[result["_gid"] == (1 << n_cols) - 1].iloc[0]
+        if total["n"] == 0:
+            return None
+
+        status, perf = group("status"), group("perf")
+        status_labels = status["EmploymentStatus"].to_numpy(dtype=object)
+        perf_labels = perf["PerformanceScore"].to_numpy(dtype=object)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            summary = kpis(
+                total["n"],
+                active=status["n"].to_numpy()[status_labels == 'Active'].sum(),
+                terminated=total["terminated"],
+                engagement_mean=np.float64(_zero(total["engagement_sum"])) / total["engagement_n"],
+                satisfaction_mean=np.float64(_zero(total["satisfaction_sum"])) / total["satisfaction_n"],
+                high_performers=perf["n"].to_numpy()[np.isin(perf_labels, HIGH_PERFORMER_SCORES)].sum(),
+            )
+        summary["perf_dist"] = count_table(perf_labels, perf["n"].to_numpy(), 'Score')
+
+        if summary["terminated"]:
+            dept, reason = group("dept"), group("reason")
+            summary["attrition_dept"] = count_table(
+                dept["Department"].to_numpy(dtype=object), dept["terminated"].to_numpy(), 'Department'
+            )
+            summary["term_reasons"] = count_table(
+                reason["TermReason"].to_numpy(dtype=object), reason["terminated"].to_numpy(), 'Reason', top=10
+            )
+            tenure = group("hist_TenureYears").sort_values("bin_TenureYears")
+            summary["tenure"] = tenure_table(
+                tenure["bin_TenureYears"].to_numpy(dtype=np.int64), tenure["n"].to_numpy()
+            )
+        else:
+            summary["attrition_dept"] = summary["term_reasons"] = summary["tenure"] = None
+
+        for col, width in HISTOGRAM_BINS.items():
+            hist = group(f"hist_{col}")
+            summary[f"hist_{col}"] = histogram_table(
+                hist[f"bin_{col}"].to_numpy(dtype=np.int64), hist["n"].to_numpy(), width
+            )
+
+        hires, terms = group("hires"), group("terminations")
+        summary["trend"] = trend_table(
+            _months(hires["_hire_month"]), hires["n"].to_numpy(), _months(terms["_term_month"]), terms["n"].to_numpy()
+        )
+
+        pairs = group("recruitment")
+        src_labels, src_codes = np.unique(pairs["RecruitmentSource"].to_numpy(dtype=object), return_inverse=True)
+        pair_status, status_codes = np.unique(pairs["EmploymentStatus"].to_numpy(dtype=object), return_inverse=True)
+        pair_counts = np.zeros((len(src_labels), len(pair_status)), dtype=np.int64)
+        pair_counts[src_codes, status_codes] = pairs["n"].to_numpy()
+        summary["recruitment"] = recruitment_table(src_labels, pair_status, pair_counts)
+
+        managers = group("manager")
+        summary["manager_stats"] = manager_table(managers["ManagerName"].to_numpy(dtype=object), {
+            "count": managers["n"].to_numpy(),
+            "perf_sum": managers["perf_sum"].fillna(0).to_numpy(dtype=float),
+            "perf_n": managers["perf_n"].to_numpy(),
+            "sat_sum": managers["satisfaction_sum"].fillna(0).to_numpy(dtype=float),
+            "sat_n": managers["satisfaction_n"].to_numpy(),
+        })
+        return summary
+
+    def rows(self, selections, columns=None):
+        where, params = _where(selections)
+        select = "*" if columns is None else ", ".join(_ident(c) for c in columns)
+        df = self._frame(f"SELECT {select} FROM hr WHERE {where} ORDER BY _pos", params)
+        return df.drop(columns=["_pos", "_TenureYears"], errors="ignore")
+
+    def box_stats(self, selections, value_col, group_col, hover_cols=(), max_outliers=None):
+        # aggregates.box_stats in SQL: quartiles interpolated between ranked
+        # values as plotly.js does, groups and outliers keep row order
+        where, params = _where(selections)
+        value, group = f"CAST({_ident(value_col)} AS DOUBLE)", _ident(group_col)
+        rows = (f"SELECT {group} AS g, {value} AS v, _pos, * FROM hr "
+                f"WHERE {where} AND {group} IS NOT NULL AND {value} IS NOT NULL AND NOT isnan({value})")
+        ranked = (f"SELECT g, v, _pos, row_number() OVER (PARTITION BY g ORDER BY v) - 1 AS i, "
+                  f"count(*) OVER (PARTITION BY g) AS n FROM ({rows})")
+        fences = f"""
+            SELECT g, n, min(_pos) AS first,
+                   {_quartile(0.25)} AS q1, {_quartile(0.5)} AS median, {_quartile(0.75)} AS q3
+            FROM ({ranked}) GROUP BY g, n
+        """
+        limits = f"SELECT *, q1 - 1.5 * (q3 - q1) AS low, q3 + 1.5 * (q3 - q1) AS high FROM ({fences})"
+        boxes = self._frame(f"""
+            WITH r AS ({rows}), f AS ({limits})
+            SELECT f.g AS {group}, f.n, f.q1, f.median, f.q3,
+                   min(r.v) FILTER (WHERE r.v BETWEEN f.low AND f.high) AS lowerfence,
+                   max(r.v) FILTER (WHERE r.v BETWEEN f.low AND f.high) AS upperfence
+            FROM r JOIN f USING (g)
+            GROUP BY ALL ORDER BY min(f.first)
+        """, params * 2)
+        if boxes.empty:
+            return None
+
+        limit = "" if max_outliers is None else f"LIMIT {int(max_outliers)}"
+        columns = ", ".join(f"r.{_ident(c)}" for c in dict.fromkeys([group_col, value_col, *hover_cols]))
+        outliers = self._frame(f"""
+            WITH r AS ({rows}), f AS ({limits}),
+            o AS (
+                SELECT {columns}, r._pos, greatest(f.low - r.v, r.v - f.high) AS distance,
+                       count(*) OVER () AS n_outliers
+                FROM r JOIN f USING (g)
+                WHERE r.v < f.low OR r.v > f.high
+                ORDER BY distance DESC, r._pos {limit}
+            )
+            SELECT * FROM o ORDER BY _pos
+        """, params * 2)
+        n_outliers = int(outliers["n_outliers"].iloc[0]) if len(outliers) else 0
+        outliers = outliers.drop(columns=["_pos", "distance", "n_outliers"]).reset_index(drop=True)
+        return {"boxes": boxes.reset_index(drop=True), "outliers": outliers, "n_outliers": n_outliers}
+
+    def facets(self, selections):
+        # Rows per combination of the filter dimensions (a few thousand at
+        # most), read once: the files are not reloaded while running
+        dims = tuple(selections)
+        if dims not in self._cells:
+            cells = self._frame(f"SELECT {', '.join(map(_ident, dims))}, count(*) AS n FROM hr GROUP BY ALL")
+            counts = cells.pop("n").to_numpy()
+            self._cells[dims] = (cells.astype(object).where(cells.notna(), None), counts)
+        return facet_counts(*self._cells[dims], selections)
+
+    def choices(self, col):
+        values = self._query(f"SELECT DISTINCT {_ident(col)} FROM hr WHERE {_ident(col)} IS NOT NULL")
+        return sorted(v for (v,) in values)
+
+
+def _where(selections):
+    # Selections -> SQL condition with ? placeholders
+    clauses, params = [], []
+    for col, values in selections.items():
+        if values:
+            clauses.append(f"{_ident(col)} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return " AND ".join(clauses) or "true", params
+
+
+def _ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _quartile(q):
+    # plotly.js "linear" quartile over ranked values i of a group of n:
+    # position q*n - 0.5, clamped to the group, interpolated between neighbours
+    pos = f"least(greatest({q} * n - 0.5, 0), n - 1)"
+    return (f"(max(v) FILTER (WHERE i = floor({pos})) * (1 - ({pos} - floor({pos})))"
+            f" + max(v) FILTER (WHERE i = ceil({pos})) * ({pos} - floor({pos})))")
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _months(column):
+    return column.to_numpy(dtype=np.int64).astype("datetime64[M]")
+
+
+def _zero(value):
+    return 0 if pd.isna(value) else value
+
+
+def from_environment(store, cube_check=False):
+    # HR_BACKEND=pandas (default) or duckdb; HR_PARQUET_PATH is a file, glob or
+    # directory of Parquet files (default: the CSV's sidecar)
+    name = os.environ.get("HR_BACKEND", "pandas")
+    if name == "pandas":
+        return PandasBackend(store, cube_check)
+    if name == "duckdb":
+        return DuckDBBackend(
+            os.environ.get("HR_PARQUET_PATH") or default_parquet_source(),
+            threads=os.environ.get("HR_DUCKDB_THREADS"),
+            memory_limit=os.environ.get("HR_DUCKDB_MEMORY_LIMIT"),
+        )
+    raise ValueError(f"Unknown HR_BACKEND {name!r} (expected pandas or duckdb)")
+
@@ -0,0 +1,382 @@
+# Headless benchmark of the dashboard's server logic.
+#
+# Drives the real server() reactive graph from main.py through Shiny's
+# in-memory test session (no browser, no network): inputs are set the way the
+# browser would set them and every message the session sends back is
+# captured. For each dataset size and filter scenario it reports
+#
+#   - filtered_df latency (index lookup + row gather, no cache),
+#   - the wall time of the whole reactive flush after the filter change,
+#   - render time and bytes sent per output (chart widgets are counted
+#     through the effects that patch them, plus their extended task for
+#     the heavy charts; work shared through summary() is charged to the
+#     first output that asks for it),
+#   - total bytes sent, raw and as permessage-deflate puts them on the
+#     wire,
+#   - peak Python memory allocated while handling the change.
+#
+# Datasets are synthetic rows of the requested size, drawn (seeded) from a
+# model of the real export (see synth_data.py). Every filter change starts from an empty result
+# cache, so the numbers are for the uncached path. Only the in-memory pandas
+# backend is measured: HR_BACKEND=duckdb is refused rather than ignored.
+#
+#   python benchmark.py                           # 10k, 100k, 1M, 10M rows
+#   python benchmark.py --sizes 10000 100000 --output bench.json
+#   python benchmark.py --compare old.json new.json
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import zlib
+from datetime import datetime, timezone
+
+# Before main.py is imported: no file watcher, filter edits apply immediately,
+# heavy charts computed on the loop (their time is then the session's own)
+os.environ.setdefault("HR_RELOAD_SECONDS", "0")
+os.environ.setdefault("HR_FILTER_DEBOUNCE_MS", "0")
+os.environ.setdefault("HR_RENDER_THREADS", "0")
+
+# The synthetic datasets are in-memory frames, so they go through
+# PandasBackend; DuckDB would keep querying the Parquet files on disk
+if os.environ.get("HR_BACKEND", "pandas") != "pandas":
+    sys.exit(f"benchmark.py measures the pandas backend only; unset HR_BACKEND "
+             f"(it is {os.environ['HR_BACKEND']!r})")
+
+import numpy as np
+import pandas as pd
+from shiny._connection import MockConnection
+from shiny.reactive import ExtendedTask
+from shiny.reactive._reactives import Effect_
+from shiny.testserver import test_server_async
+
+from backends import PandasBackend
+import charts
+import main
+from hot_reload import HRStore
+from synth_data import HRModel, synthesize
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+RESET = {"dept_filter": [], "recruit_filter": [], "marital_filter": [], "sex_filter": "All"}
+SCENARIOS = {
+    "all_rows": {},
+    "one_department": {"dept_filter": ["Production"]},
+    "department_and_sex": {"dept_filter": ["Production"], "sex_filter": "F"},
+    "multi_select": {
+        "dept_filter": ["Production", "Sales", "IT/IS"],
+        "recruit_filter": ["Indeed", "LinkedIn", "Google Search"],
+        "marital_filter": ["Married", "Single"],
+    },
+    "narrow": {
+        "dept_filter": ["Sales"], "recruit_filter": ["LinkedIn"],
+        "marital_filter": ["Single"], "sex_filter": "M",
+    },
+}
+
+
+def deflated_size(messages):
+    # permessage-deflate as uvicorn negotiates it: a 4 KB window (12 bits)
+    # kept across messages, without the 4-byte flush marker per message
+    compressor = zlib.compressobj(wbits=-12, memLevel=5)
+    return sum(len(compressor.compress(raw.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)) - 4
+               for _, raw in messages)
+
+
+def use_dataset(df):
+    # Point the app at a new dataset, as a hot reload would
+    main.store = HRStore(df, main.FILTER_COLUMNS)
+    main.store.listeners.append(main._invalidate_cache)
+    main.backend = PandasBackend(main.store, main.CUBE_CHECK)
+    main.shared_cache.clear()
+
+
+def filtered_df_ms(selections, repeat):
+    snap = main.store.current
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = snap.filter_index.positions(selections)
+        dff = snap.df if rows is None else snap.df.take(rows)
+        times.append(time.perf_counter() - start)
+    return 1000 * min(times), len(dff)
+
+
+# --- Instrumentation ---
+# Outputs are Effects owned by the session's Outputs; chart effects are tied
+# to their output through the widget they pass to charts.patch().
+
+class Probe:
+    def __init__(self):
+        self.messages = []        # (time, raw message) sent to the "browser"
+        self.effect_times = {}    # Effect -> seconds spent in this change
+        self.effect_widgets = {}  # Effect -> model_id of the widget it patched
+        self.task_times = {}      # chart -> seconds its extended tasks took
+        self.tasks = []           # every ExtendedTask started
+        self.current = None
+        self.session = None
+
+    def install(self):
+        probe = self
+        send, run, patch, server = MockConnection.send, Effect_._run, charts.patch, main.app.server
+        invoke, observe = ExtendedTask._invoke, main.telemetry.observe
+
+        async def capture_send(conn, message):
+            probe.messages.append((time.perf_counter(), message))
+            await send(conn, message)
+
+        async def timed_run(effect):
+            outer, probe.current = probe.current, effect
+            start = time.perf_counter()
+            try:
+                await run(effect)
+            finally:
+                probe.effect_times[effect] = probe.effect_times.get(effect, 0) + time.perf_counter() - start
+                probe.current = outer
+
+        def recorded_patch(widget, *args, **kwargs):
+            probe.effect_widgets[probe.current] = widget.model_id
+            return patch(widget, *args, **kwargs)
+
+        def tracked_invoke(task, *args, **kwargs):
+            if task not in probe.tasks:
+                probe.tasks.append(task)
+            return invoke(task, *args, **kwargs)
+
+        def timed_task(kind, name, seconds):
+            probe.task_times[name] = probe.task_times.get(name, 0) + seconds
+            return observe(kind, name, seconds)
+
+        def capture_server(input, output, session):
+            probe.session = session
+            return server(input, output, session)
+
+        MockConnection.send = capture_send
+        Effect_._run = timed_run
+        charts.patch = recorded_patch
+        main.app.server = capture_server
+        ExtendedTask._invoke = tracked_invoke
+        main.telemetry.observe = timed_task
+
+    def reset(self):
+        self.messages.clear()
+        self.effect_times.clear()
+        self.task_times.clear()
+
+    def output_names(self):
+        names, widgets = {}, {}
+        for name, info in self.session.output._outputs.items():
+            names[info.effect] = name
+            widget = getattr(info.renderer, "_widget", None)
+            if widget is not None:
+                widgets[widget.model_id] = name
+        return names, widgets
+
+    async def settled(self, timeout):
+        # A change is handled once the session has sent the new output values
+        # (timer-driven flushes send empty ones; the first flush of a session,
+        # before any filter is applied, only clears the text outputs) and the
+        # heavy charts' tasks have all been drawn
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            values = any(
+                raw.startswith('{"values"') and any(isinstance(v, str) for v in json.loads(raw)["values"].values())
+                for _, raw in self.messages
+            )
+            if values and all(t._task is None and not t._invocation_queue and not t._done_tasks for t in self.tasks):
+                return self.messages[-1][0]
+            await asyncio.sleep(0.001)
+        raise TimeoutError("no output values within %.0fs" % timeout)
+
+    def per_output(self):
+        names, widgets = self.output_names()
+        outputs = {}
+
+        def entry(name):
+            return outputs.setdefault(name, {"render_ms": 0.0, "bytes": 0})
+
+        for effect, seconds in self.effect_times.items():
+            name = names.get(effect) or widgets.get(self.effect_widgets.get(effect))
+            if name is not None:
+                entry(name)["render_ms"] += 1000 * seconds
+        for name, seconds in self.task_times.items():
+            entry(name)["render_ms"] += 1000 * seconds
+
+        for _, raw in self.messages:
+            msg = json.loads(raw)
+            if "values" in msg:
+                for name, value in msg["values"].items():
+                    entry(name)["bytes"] += len(json.dumps(value))
+            elif "custom" in msg and "shinywidgets_comm_msg" in msg["custom"]:
+                comm = json.loads(msg["custom"]["shinywidgets_comm_msg"])
+                name = widgets.get(comm["content"]["comm_id"])
+                if name is not None:
+                    entry(name)["bytes"] += len(raw)
+        for value in outputs.values():
+            value["render_ms"] = round(value["render_ms"], 3)
+        return dict(sorted(outputs.items()))
+
+
+async def run_scenarios(probe, scenarios, repeat, timeout):
+    results = []
+    async with test_server_async(main.app, timeout_secs=timeout) as ts:
+        probe.reset()
+        await ts.set_inputs(**RESET, apply_mode=False, mode="light", mgr_search="", mgr_sort="PerfScoreNum")
+        await probe.settled(timeout)
+
+        for name, change in scenarios.items():
+            inputs = {**RESET, **change}
+            selections = main.key_selections(main.make_filter_key(
+                inputs["dept_filter"], inputs["recruit_filter"], inputs["marital_filter"], inputs["sex_filter"]
+            ))
+            df_ms, n_filtered = filtered_df_ms(selections, repeat)
+
+            runs, peak = [], 0
+            for i in range(repeat + 1):
+                # Start from a state matching no rows, so the change is a real one
+                probe.reset()
+                await ts.set_inputs(**{**RESET, "sex_filter": "__benchmark__"})
+                await probe.settled(timeout)
+                main.shared_cache.clear()
+                probe.reset()
+                traced = i == repeat  # last pass measures memory only
+                if traced:
+                    tracemalloc.start()
+                start = time.perf_counter()
+                await ts.set_inputs(**inputs)
+                done = await probe.settled(timeout)
+                if traced:
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                else:
+                    runs.append((1000 * (done - start), probe.per_output(),
+                                 sum(len(raw) for _, raw in probe.messages), deflated_size(probe.messages)))
+
+            flush_ms = [r[0] for r in runs]
+            median_run = sorted(runs, key=lambda r: r[0])[len(runs) // 2]
+            results.append({
+                "scenario": name,
+                "inputs": change,
+                "filtered_rows": n_filtered,
+                "filtered_df_ms": round(df_ms, 3),
+                "flush_ms": round(statistics.median(flush_ms), 3),
+                "flush_ms_min": round(min(flush_ms), 3),
+                "bytes_sent": median_run[2],
+                "bytes_deflated": median_run[3],
+                "peak_alloc_mb": round(peak / 2**20, 2),
+                "outputs": median_run[1],
+            })
+            if not ts.is_ok:
+                raise RuntimeError(f"{name}: {ts.error}")
+    if main.telemetry.enabled:
+        # Every chart's update bytes are still attributed at /metrics
+        metrics = main.telemetry.exposition()
+        missing = [name for name in main.CHART_TITLES
+                   if f'hr_output_payload_bytes_total{{output="{name}",' not in metrics]
+        if missing:
+            raise RuntimeError(f"no payload bytes at /metrics for {', '.join(missing)}")
+    return results
+
+
+async def run(sizes, repeat, seed, timeout):
+    probe = Probe()
+    probe.install()
+    main.data_ready.wait()  # HR_FAST_START=1 loads it in the background
+    model = HRModel(main.store.current.df)
+    report = {"meta": environment(), "results": []}
+    for n_rows in sizes:
+        df = synthesize(n_rows, seed, model)
+        start = time.perf_counter()
+        use_dataset(df)
+        build_s = time.perf_counter() - start
+        print(f"{n_rows:>10,} rows: index + cube built in {build_s:.2f}s", file=sys.stderr)
+
+        scenarios = await run_scenarios(probe, SCENARIOS, repeat, timeout)
+        for s in scenarios:
+            print(f"{'':>16}{s['scenario']:<20} flush {s['flush_ms']:>9.1f} ms"
+                  f"  filtered_df {s['filtered_df_ms']:>8.2f} ms  {s['bytes_sent']:>9,} B"
+                  f" ({s['bytes_deflated']:,} B deflated)", file=sys.stderr)
+        report["results"].append({
+            "rows": n_rows,
+            "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+            "build_s": round(build_s, 3),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "scenarios": scenarios,
+        })
+        del df
+    return report
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+# --- Comparing two runs ---
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    old_results = {(r["rows"], s["scenario"]): s for r in old["results"] for s in r["scenarios"]}
+    for result in new["results"]:
+        for s in result["scenarios"]:
+            before = old_results.get((result["rows"], s["scenario"]))
+            if before is None:
+                continue
+            print(f"{result['rows']:>10,} {s['scenario']:<20}"
+                  + "".join(f"  {key} {_change(before[key], s[key])}"
+                            for key in ["flush_ms", "filtered_df_ms", "bytes_sent", "bytes_deflated", "peak_alloc_mb"]
+                            if key in before))
+
+
+def _change(before, after):
+    if not before:
+        return f"{after} (was {before})"
+    return f"{after} ({(after - before) / before:+.0%})"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless benchmark of the dashboard server logic")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per scenario (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=600, help="seconds to wait for one flush")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two JSON reports")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+    else:
+        # One event loop for every size: Shiny's reactive lock is bound to it
+        report = asyncio.run(run(args.sizes, args.repeat, args.seed, args.timeout))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+            print()
@@ -0,0 +1,301 @@
+# Persistent Plotly widgets for the dashboard charts.
+#
+# Every chart is created once per session as a go.FigureWidget with its
+# theme and layout applied up front. When the filters change, only the new
+# traces are pushed into the existing widget inside one batch_update(), so
+# the browser restyles the plot it already has instead of tearing the widget
+# down and building a new one, and no Plotly Express figure is built per
+# change. The trace builders below reproduce what the px calls used to draw.
+#
+# WIRE FORMAT: numeric arrays of at least HR_WIDGET_BINARY_MIN values are
+# packed into the smallest typed array that holds them exactly (counts in
+# uint8/uint16, whole-number floats as integers), which plotly's widget
+# sends as a base64 buffer instead of a JSON list; shorter arrays stay
+# JSON, where they are smaller. Widget messages are encoded with orjson
+# when it is installed (see use_fast_json), and uvicorn's permessage-deflate
+# (on by default) compresses them on the websocket, mostly the repeated
+# labels.
+#
+# The widget's own script (about 5 MB) is part of every chart's initial
+# state unless the chart is given its URL: then it is served once, at
+# /BUNDLE_NAME, and the browser loads and caches it.
+
+import functools
+import gzip
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.graph_objects as go
+from starlette.responses import FileResponse, Response
+
+BASE_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font_color="gray",
+)
+
+
+WIDGET_BUNDLE = Path(plotly.__file__).parent / "package_data" / "widgetbundle.js"
+BUNDLE_NAME = f"plotly-widget-{plotly.__version__}.js"
+
+
+@functools.lru_cache(maxsize=8)
+def _widget_class(bundle_url):
+    # FigureWidget loading its script from bundle_url. The URL comes from the
+    # browser's address, so only the few most recent hosts are kept.
+    return type("FigureWidget", (go.FigureWidget,), {
+        "_esm": bundle_url, "__module__": go.FigureWidget.__module__,
+    })
+
+
+def figure_widget(bundle_url=None, **layout):
+    # anywidget only fetches absolute http(s) URLs; anything else is inlined
+    cls = _widget_class(bundle_url) if bundle_url else go.FigureWidget
+    return cls(layout={**BASE_LAYOUT, **layout})
+
+
+@functools.lru_cache(maxsize=1)
+def _gzipped_bundle():
+    return gzip.compress(WIDGET_BUNDLE.read_bytes())
+
+
+async def bundle_endpoint(request):
+    # Versioned name, so it can be cached for good; gzipped (once) when the
+    # browser accepts it, a third of the size
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(_gzipped_bundle(), media_type="text/javascript",
+                        headers={**headers, "Content-Encoding": "gzip"})
+    return FileResponse(WIDGET_BUNDLE, media_type="text/javascript", headers=headers)
+
+
+def figure(traces, layout=None, **base_layout):
+    # Standalone figure with the same theme, for static snapshots
+    fig = go.Figure(data=traces, layout={**BASE_LAYOUT, **base_layout})
+    if layout:
+        fig.update_layout(layout)
+    return fig
+
+
+def patch(widget, traces, layout=None):
+    # Same kinds of traces as before: update them in place. Otherwise (a new
+    # department, the first non-empty result...) swap the trace list.
+    with widget.batch_update():
+        if [t.type for t in widget.data] == [t.type for t in traces]:
+            for old, new in zip(widget.data, traces):
+                old.update(compact(new.to_plotly_json()), overwrite=True)
+        else:
+            widget.data = ()
+            if traces:
+                widget.add_traces([compact(t.to_plotly_json()) for t in traces])
+        if layout:
+            widget.update_layout(layout)
+
+
+# --- Wire format ---
+
+BINARY_MIN = int(os.environ.get("HR_WIDGET_BINARY_MIN", "32"))
+
+# Smallest first; int64 and uint64 have no JavaScript typed array
+INT_TYPES = [np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32]
+
+
+def compact(value):
+    # Trace properties (to_plotly_json()) with their numeric arrays packed
+    if isinstance(value, dict):
+        return {k: compact(v) for k, v in value.items()}
+    if isinstance(value, np.ndarray) and value.ndim == 1 and value.dtype.kind in "iuf":
+        return pack_array(value)
+    return value
+
+
+def pack_array(values):
+    if len(values) < max(BINARY_MIN, 1):
+        # NaN as null: gaps to Plotly, and valid JSON
+        return [None if v != v else v for v in values.tolist()]
+    if values.dtype.kind == "f":
+        if not np.isfinite(values).all() or not np.array_equal(values, np.round(values)):
+            return np.ascontiguousarray(values)
+    low, high = values.min(), values.max()
+    for dtype in INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.ascontiguousarray(values, dtype=dtype)
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def use_fast_json():
+    # Encode shinywidgets messages with orjson instead of its json.dumps;
+    # dates and other extras still go through its json_default. Unlike its
+    # allow_nan=False, NaN and infinities are written as null instead of
+    # raising: a gap in a Plotly trace, which is what NaN means there.
+    # This replaces shinywidgets internals (written against 0.8.1, pinned in
+    # requirements.txt); if they have moved, the stock encoder stays.
+    if orjson is None:
+        return False
+    try:
+        import shinywidgets._comm as comm
+        from shinywidgets._serialization import json_default
+        comm.json_packer
+    except (ImportError, AttributeError):
+        return False
+
+    options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def json_packer(obj):
+        return orjson.dumps(obj, default=json_default, option=options).decode()
+
+    comm.json_packer = json_packer
+    return True
+
+
+# --- Trace builders (None/empty input draws an empty chart) ---
+
+def colorscale(low, high):
+    return dict(colorscale=[[0, low], [1, high]], colorbar=dict(title=dict(text="Count")))
+
+
+def count_bars(table, label_col):
+    # Horizontal bars coloured by Count (px.bar(..., color="Count"))
+    if table is None:
+        return []
+    return [go.Bar(
+        x=table["Count"], y=table[label_col], orientation="h",
+        marker=dict(color=table["Count"], coloraxis="coloraxis"),
+        hovertemplate=f"Count=%{{x}}<br>{label_col}=%{{y}}<extra></extra>",
+        showlegend=False,
+    )]
+
+
+def tenure_bars(table, color):
+    if table is None:
+        return []
+    return [go.Bar(
+        x=table["Label"], y=table["Count"], marker_color=color,
+        hovertemplate="Label=%{x}<br>Count=%{y}<extra></extra>",
+        showlegend=False,
+    )]
+
+
+def histogram_bars(table, width, label, color, prefix=""):
+    # One bar per bin [Bin, Bin + width) (see aggregates.histogram_table)
+    if table is None:
+        return []
+    return [go.Bar(
+        x=table["Bin"] + width / 2, y=table["Count"], width=width, marker_color=color,
+        customdata=np.column_stack([table["Bin"], table["Bin"] + width]),
+        hovertemplate=f"{label}={prefix}%{{customdata[0]:,}} to {prefix}%{{customdata[1]:,}}"
+                      "<br>Count=%{y}<extra></extra>",
+        showlegend=False,
+    )]
+
+
+def recruitment_bars(table, colors):
+    # One stacked trace per employment status, in order of appearance
+    if table is None:
+        return []
+    traces = []
+    for i, status in enumerate(pd.unique(table["EmploymentStatus"])):
+        rows = table[table["EmploymentStatus"] == status]
+        traces.append(go.Bar(
+            name=status, legendgroup=status,
+            x=rows["Count"], y=rows["RecruitmentSource"], orientation="h",
+            marker_color=colors[i % len(colors)],
+            hovertemplate=f"EmploymentStatus={status}<br>Count=%{{x}}<br>RecruitmentSource=%{{y}}<extra></extra>",
+        ))
+    return traces
+
+
+def score_pie(table):
+    if table is None:
+        return []
+    return [go.Pie(
+        values=table["Count"], labels=table["Score"], hole=0.4,
+        hovertemplate="Score=%{label}<br>Count=%{value}<extra></extra>",
+    )]
+
+
+def trend_traces(trend, colors):
+    # Hires and terminations as bars, headcount as a line, attrition rate
+    # as a dotted line on a right-hand percentage axis (y2)
+    if trend is None:
+        return []
+    # As date strings: datetime64 arrays would reach the widget as integers
+    months = trend["Month"].dt.strftime("%Y-%m-%d")
+    return [
+        go.Bar(
+            name="Hires", x=months, y=trend["Hires"], marker_color=colors[2],
+            hovertemplate="Month=%{x|%b %Y}<br>Hires=%{y}<extra></extra>",
+        ),
+        go.Bar(
+            name="Terminations", x=months, y=trend["Terminations"], marker_color=colors[5],
+            hovertemplate="Month=%{x|%b %Y}<br>Terminations=%{y}<extra></extra>",
+        ),
+        go.Scatter(
+            name="Headcount", x=months, y=trend["Headcount"], mode="lines",
+            line=dict(color=colors[1], width=2),
+            hovertemplate="Month=%{x|%b %Y}<br>Headcount=%{y}<extra></extra>",
+        ),
+        go.Scatter(
+            name="Attrition Rate", x=months, y=trend["AttritionRate"], mode="lines", yaxis="y2",
+            line=dict(color=colors[0], width=1.5, dash="dot"),
+            hovertemplate="Month=%{x|%b %Y}<br>Attrition Rate=%{y:.1%}<extra></extra>",
+        ),
+    ]
+
+
+def manager_bars(mgr_stats, colors):
+    if mgr_stats is None:
+        return []
+    return [
+        go.Bar(
+            name=name, legendgroup=name,
+            x=mgr_stats[col], y=mgr_stats["ManagerName"], orientation="h",
+            marker_color=color,
+            hovertemplate=f"Metric={name}<br>Score=%{{x}}<br>ManagerName=%{{y}}<extra></extra>",
+        )
+        for name, col, color in [
+            ("Avg Performance", "PerfScoreNum", colors[0]),
+            ("Avg Satisfaction", "EmpSatisfaction", colors[1]),
+        ]
+    ]
+
+
+def box_traces(box, value_col, hover_cols, colors):
+    # Box plot from precomputed statistics (see aggregates.box_stats)
+    if box is None:
+        return []
+    traces = []
+    dept_colors = {}
+    for i, row in enumerate(box["boxes"].itertuples(index=False)):
+        dept_colors[row.Department] = colors[i % len(colors)]
+        traces.append(go.Box(
+            name=row.Department, x=[row.Department],
+            q1=[row.q1], median=[row.median], q3=[row.q3],
+            lowerfence=[row.lowerfence], upperfence=[row.upperfence],
+            boxpoints=False, marker_color=dept_colors[row.Department],
+        ))
+
+    outliers = box["outliers"]
+    hover = "<br>".join(
+        ["Department=%{x}", f"{value_col}=%{{y}}"]
+        + [f"{col}=%{{customdata[{i}]}}" for i, col in enumerate(hover_cols)]
+    )
+    # Always present (possibly empty) so the trace list keeps its shape
+    traces.append(go.Scatter(
+        x=outliers["Department"], y=outliers[value_col], mode="markers",
+        marker_color=outliers["Department"].map(dept_colors).astype(object),
+        customdata=outliers[hover_cols].astype(object).to_numpy(),
+        hovertemplate=hover + "<extra></extra>",
+        showlegend=False,
+    ))
+    return traces
@@ -0,0 +1,310 @@
+# Pre-materialized cube over the four sidebar filter dimensions.
+#
+# Department, RecruitmentSource, MaritalDesc and Sex only have a few dozen
+# combinations between them, and every KPI and bar/pie chart is a count, sum
+# or mean. So at load time the rows are rolled up once into one cell per
+# combination holding counts, sums, per-category count vectors and histogram
+# bin counts for the numeric fields, plus hires and terminations per calendar
+# month for the headcount trend. A filter then selects cells (with the
+# same bitmap index used for rows) and adds them up; the cost no longer
+# depends on headcount.
+#
+# Managers are many but each sits in few cells, so their sums and counts are
+# kept as a sparse (cell, manager) table instead of a dense crosstab.
+#
+# Distribution views (the box plots) still need rows.
+#
+# The sidebar's per-option counts (facet_counts) come from the cells too.
+#
+#   python -m pytest tests/test_cube.py   # cube vs row-level answers for many filters
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from aggregates import (
+    HIGH_PERFORMER_SCORES, HISTOGRAM_BINS, MANAGER_MEASURES, bin_codes, bincount, codes_of,
+    count_table, histogram_table, kpis, manager_sums, manager_table, month_codes, perf_numbers,
+    recruitment_table, summarize, tenure_table, trend_table,
+)
+from filter_index import FilterIndex
+
+logger = logging.getLogger(__name__)
+
+
+class HRCube:
+    def __init__(self, df, dims):
+        self.dims = list(dims)
+
+        # --- Cell id for every row (mixed-radix code over the dimensions) ---
+        dim_codes = []
+        radix = np.zeros(len(df), dtype=np.int64)
+        for dim in self.dims:
+            codes, labels = codes_of(df[dim])
+            dim_codes.append((codes, labels))
+            radix = radix * (len(labels) + 1) + (codes + 1)
+        cell_keys, cell_of_row = np.unique(radix, return_inverse=True)
+        n_cells = len(cell_keys)
+        # Any one row of each cell carries that cell's dimension values
+        sample_row = np.zeros(n_cells, dtype=np.int64)
+        sample_row[cell_of_row] = np.arange(len(df))
+
+        self.cells = pd.DataFrame({
+            dim: pd.Series(labels, dtype=object).reindex(codes[sample_row]).to_numpy()
+            for dim, (codes, labels) in zip(self.dims, dim_codes)
+        })
+        self.cell_index = FilterIndex(self.cells, self.dims)
+
+        # --- Additive measures per cell ---
+        termd = df['Termd'].to_numpy() == 1
+        self.measures = {
+            "count": np.bincount(cell_of_row, minlength=n_cells),
+            "terminated": np.bincount(cell_of_row[termd], minlength=n_cells),
+        }
+        for col, name in [('EngagementSurvey', 'engagement'), ('EmpSatisfaction', 'satisfaction'),
+                          ('Absences', 'absences')]:
+            values = df[col].to_numpy(dtype=float)
+            ok = ~np.isnan(values)
+            self.measures[f"{name}_sum"] = np.bincount(cell_of_row[ok], weights=values[ok], minlength=n_cells)
+            self.measures[f"{name}_n"] = np.bincount(cell_of_row[ok], minlength=n_cells)
+
+        # --- Per-category counts per cell: name -> (labels, cells x labels) ---
+        self.crosstabs = {
+            "status": self._crosstab(cell_of_row, *codes_of(df['EmploymentStatus']), n_cells),
+            "perf": self._crosstab(cell_of_row, *codes_of(df['PerformanceScore']), n_cells),
+            "reason": self._crosstab(cell_of_row, *codes_of(df['TermReason']), n_cells, termd),
+        }
+        # Histogram bins are sorted integers (see aggregates.bin_codes)
+        for col, width in HISTOGRAM_BINS.items():
+            self.crosstabs[f"hist_{col}"] = self._crosstab(cell_of_row, *bin_codes(df[col], width), n_cells)
+        # Events per calendar month (datetime64[M] labels, in any order)
+        self.crosstabs["hires"] = self._crosstab(cell_of_row, *month_codes(df['DateofHire']), n_cells)
+        self.crosstabs["terminations"] = self._crosstab(
+            cell_of_row, *month_codes(df['DateofTermination'], termd), n_cells
+        )
+
+        # --- Per-manager sums for the (cell, manager) pairs that occur ---
+        mgr_codes, mgr_labels = codes_of(df['ManagerName'])
+        ok = mgr_codes >= 0
+        pairs, pair_of_row = np.unique(cell_of_row[ok] * len(mgr_labels) + mgr_codes[ok], return_inverse=True)
+        self.managers = ManagerPairs(
+            mgr_labels, pairs // len(mgr_labels), pairs % len(mgr_labels),
+            manager_sums(
+                pair_of_row, len(pairs),
+                perf_numbers(*codes_of(df['PerformanceScore']))[ok],
+                df['EmpSatisfaction'].to_numpy(dtype=float)[ok],
+            ),
+        )
+
+    @staticmethod
+    def _crosstab(cell_of_row, codes, labels, n_cells, mask=None):
+        k = len(labels)
+        flat = np.where(codes >= 0, cell_of_row * k + codes, -1)
+        return labels, bincount(flat, n_cells * k, mask).reshape(n_cells, k)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def nbytes(self):
+        arrays = list(self.measures.values()) + [m for _, m in self.crosstabs.values()]
+        arrays += [self.managers.cell, self.managers.manager] + list(self.managers.sums.values())
+        return sum(a.nbytes for a in arrays) + int(self.cells.memory_usage(deep=True).sum())
+
+    # --- Incremental maintenance ---
+
+    def merge(self, other, sign=1):
+        # New cube = self + sign * other. Cells and category labels missing
+        # on one side are added with zeros; self is left untouched, so readers
+        # of the old cube keep a consistent view.
+        merged = object.__new__(HRCube)
+        merged.dims = self.dims
+        keys = list(self.cells.itertuples(index=False, name=None))
+        position = {key: i for i, key in enumerate(keys)}
+        new_keys = [key for key in other.cells.itertuples(index=False, name=None) if key not in position]
+        for key in new_keys:
+            position[key] = len(position)
+        other_pos = np.array([position[key] for key in other.cells.itertuples(index=False, name=None)],
+                             dtype=np.int64)
+        n_cells = len(position)
+
+        merged.cells = pd.concat(
+            [self.cells, pd.DataFrame(new_keys, columns=self.dims, dtype=object)], ignore_index=True
+        ) if new_keys else self.cells
+        merged.cell_index = FilterIndex(merged.cells, merged.dims) if new_keys else self.cell_index
+
+        merged.measures = {}
+        for name, values in self.measures.items():
+            out = np.zeros(n_cells, dtype=np.result_type(values, other.measures[name]))
+            out[:len(values)] = values
+            np.add.at(out, other_pos, sign * other.measures[name])
+            merged.measures[name] = out
+
+        merged.crosstabs = {}
+        for name, (labels, matrix) in self.crosstabs.items():
+            other_labels, other_matrix = other.crosstabs[name]
+            all_labels = np.concatenate([labels, other_labels[~np.isin(other_labels, labels)]])
+            if name.startswith("hist_"):
+                all_labels = np.sort(all_labels)
+            label_pos = {label: i for i, label in enumerate(all_labels)}
+            out = np.zeros((n_cells, len(all_labels)), dtype=np.int64)
+            out[np.arange(len(matrix))[:, None], [label_pos[l] for l in labels]] = matrix
+            np.add.at(out, (other_pos[:, None], [label_pos[l] for l in other_labels]), sign * other_matrix)
+            merged.crosstabs[name] = (all_labels, out)
+
+        merged.managers = self.managers.merge(other.managers, other_pos, sign)
+        return merged
+
+    def changed_cells(self, other):
+        # Dimension values of the cells whose measures differ between two cubes
+        diff = self.merge(other, sign=-1)
+        changed = np.zeros(len(diff), dtype=bool)
+        for values in diff.measures.values():
+            changed |= ~np.isclose(values, 0)
+        for _, matrix in diff.crosstabs.values():
+            changed |= (matrix != 0).any(axis=1)
+        for values in diff.managers.sums.values():
+            changed[diff.managers.cell[~np.isclose(values, 0)]] = True
+        return diff.cells[changed].reset_index(drop=True)
+
+    # --- Queries ---
+
+    def summarize(self, selections):
+        # Same shape as aggregates.summarize()
+        mask = self.cell_index.mask(selections)
+        cells = slice(None) if mask is None else mask
+        m = {name: values[cells].sum() for name, values in self.measures.items()}
+        if m["count"] == 0:
+            return None
+        totals = {name: (labels, matrix[cells].sum(axis=0)) for name, (labels, matrix) in self.crosstabs.items()}
+
+        status_labels, status_totals = totals["status"]
+        perf_labels, perf_totals = totals["perf"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            summary = kpis(
+                m["count"],
+                active=status_totals[status_labels == 'Active'].sum(),
+                terminated=m["terminated"],
+                engagement_mean=m["engagement_sum"] / m["engagement_n"],
+                satisfaction_mean=m["satisfaction_sum"] / m["satisfaction_n"],
+                high_performers=perf_totals[np.isin(perf_labels, HIGH_PERFORMER_SCORES)].sum(),
+            )
+        summary["perf_dist"] = count_table(perf_labels, perf_totals, 'Score')
+
+        if summary["terminated"]:
+            summary["attrition_dept"] = self._rollup_by('Department', self.measures["terminated"], cells)
+            summary["term_reasons"] = count_table(*totals["reason"], 'Reason', top=10)
+            summary["tenure"] = tenure_table(*totals["hist_TenureYears"])
+        else:
+            summary["attrition_dept"] = summary["term_reasons"] = summary["tenure"] = None
+
+        for col, width in HISTOGRAM_BINS.items():
+            summary[f"hist_{col}"] = histogram_table(*totals[f"hist_{col}"], width)
+
+        summary["trend"] = trend_table(*totals["hires"], *totals["terminations"])
+
+        src_codes, src_labels = codes_of(self.cells['RecruitmentSource'][cells])
+        status_matrix = self.crosstabs["status"][1][cells]
+        pair_counts = np.zeros((len(src_labels), len(status_labels)), dtype=np.int64)
+        ok = src_codes >= 0
+        np.add.at(pair_counts, src_codes[ok], status_matrix[ok])
+        summary["recruitment"] = recruitment_table(src_labels, status_labels, pair_counts)
+        summary["manager_stats"] = self.managers.table(mask)
+        return summary
+
+    def _rollup_by(self, dim, measure, cells):
+        codes, labels = codes_of(self.cells[dim][cells])
+        return count_table(labels, bincount(codes, len(labels), weights=measure[cells]), dim)
+
+    def facets(self, selections):
+        return facet_counts(self.cells, self.measures["count"], selections)
+
+
+def facet_counts(cells, counts, selections):
+    # Rows per value of every dimension, given the selections on the *other*
+    # dimensions: dim -> {value: count}, zeros included. One pass over the
+    # cells: a cell counts for every dimension if it matches all selections,
+    # and only for the dimension it misses if it misses exactly one.
+    matches = {}
+    for dim in cells.columns:
+        selected = selections.get(dim)
+        values = cells[dim].to_numpy(dtype=object)
+        matches[dim] = np.isin(values, selected) if selected else np.ones(len(values), dtype=bool)
+    misses = np.sum([~m for m in matches.values()], axis=0)
+
+    facets = {}
+    for dim, match in matches.items():
+        keep = (misses == 0) | ((misses == 1) & ~match)
+        codes, labels = codes_of(cells[dim])
+        totals = bincount(codes, len(labels), keep, counts)
+        facets[dim] = {label: int(n) for label, n in sorted(zip(labels, np.rint(totals)))}
+    return facets
+
+
+class ManagerPairs:
+    # Sums per (cell, manager) pair: pair i belongs to cell[i] and manager[i]
+    def __init__(self, labels, cell, manager, sums):
+        self.labels = labels
+        self.cell = cell
+        self.manager = manager
+        self.sums = sums
+
+    def table(self, cell_mask=None):
+        # Per-manager means over the selected cells
+        keep = slice(None) if cell_mask is None else cell_mask[self.cell]
+        manager = self.manager[keep]
+        k = len(self.labels)
+        return manager_table(self.labels, {
+            name: np.bincount(manager, weights=self.sums[name][keep], minlength=k)
+            for name in MANAGER_MEASURES
+        })
+
+    def merge(self, other, other_cell_pos, sign=1):
+        # self + sign * other; other's cells are renumbered through other_cell_pos
+        labels = np.concatenate([self.labels, other.labels[~np.isin(other.labels, self.labels)]])
+        label_pos = {label: i for i, label in enumerate(labels)}
+        other_manager = np.array([label_pos[l] for l in other.labels], dtype=np.int64)[other.manager]
+        keys = np.concatenate([self.cell * len(labels) + self.manager,
+                               other_cell_pos[other.cell] * len(labels) + other_manager])
+        pairs, pair_of = np.unique(keys, return_inverse=True)
+        sums = {
+            name: np.bincount(pair_of, weights=np.concatenate([self.sums[name], sign * other.sums[name]]),
+                              minlength=len(pairs))
+            for name in MANAGER_MEASURES
+        }
+        return ManagerPairs(labels, pairs // len(labels), pairs % len(labels), sums)
+
+
+# --- CONSISTENCY CHECK ---
+
+def compare_summaries(cube_summary, row_summary, rtol=1e-9):
+    # Differences between a cube answer and the row-level answer (empty = consistent)
+    if cube_summary is None or row_summary is None:
+        return [] if cube_summary is row_summary else ["one side is empty"]
+
+    problems = []
+    for key, expected in row_summary.items():
+        if key not in cube_summary:
+            continue
+        got = cube_summary[key]
+        if isinstance(expected, pd.DataFrame) or isinstance(got, pd.DataFrame):
+            try:
+                pd.testing.assert_frame_equal(got, expected, check_dtype=False, rtol=rtol)
+            except AssertionError as e:
+                problems.append(f"{key}: {e}")
+        elif isinstance(expected, float):
+            if not np.isclose(got, expected, rtol=rtol, equal_nan=True):
+                problems.append(f"{key}: cube={got} rows={expected}")
+        elif got != expected:
+            problems.append(f"{key}: cube={got} rows={expected}")
+    return problems
+
+
+def check_selection(cube, df, filter_index, selections):
+    rows = filter_index.positions(selections)
+    dff = df if rows is None else df.take(rows)
+    problems = compare_summaries(cube.summarize(selections), summarize(dff))
+    for problem in problems:
+        logger.warning("Cube mismatch for %s: %s", selections, problem)
+    return problems
+
@@ -0,0 +1,238 @@
+# Loading the HR dataset.
+#
+# Only the columns the dashboard uses are read, with explicit dtypes so pandas
+# doesn't have to infer them. The parsed frame is written next to the CSV as
+# a typed Parquet sidecar ("<name>.csv.parquet" + "<name>.csv.meta.json") and
+# reused on the next start as long as the CSV hasn't changed: same mtime and
+# size, or failing that the same content hash. Very large CSVs are streamed in
+# chunks instead of being parsed in one go.
+#
+# Every frame goes through compact_frame(): filter/group-by columns become
+# whitespace-stripped categoricals, numbers are downcast (floats only when
+# that is exact), columns the dashboard never reads are dropped, and derived
+# columns (TenureYears) are added once here instead of on every render.
+#
+#   python data_loader.py     # per-column memory before and after compaction
+#
+# Parquet needs pyarrow; without it every start simply parses the CSV.
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:
+    HAS_PARQUET = False
+
+DATA_PATH = Path(os.environ.get("HR_DATA_PATH", Path(__file__).parent / "HRDataset_v14.csv"))
+
+# Bump whenever the columns or their processing change, so old sidecars are rebuilt
+SIDECAR_VERSION = 5
+
+# Whole-number columns are read as floats so a blank cell is NaN rather
+# than an error; compact_frame() makes them integers again when complete
+DTYPES = {
+    "Employee_Name": str,
+    "Termd": "float64",
+    "Sex": str,
+    "MaritalDesc": str,
+    "TermReason": str,
+    "EmploymentStatus": str,
+    "Department": str,
+    "ManagerName": str,
+    "RecruitmentSource": str,
+    "PerformanceScore": str,
+    "EngagementSurvey": "float64",
+    "EmpSatisfaction": "float64",
+    "Absences": "float64",
+    "Salary": "float64",
+}
+DATE_COLUMNS = ["DateofHire", "DateofTermination"]
+USE_COLUMNS = list(DTYPES) + DATE_COLUMNS
+
+# Added by compact_frame(); TenureYears is whole years between hire and
+# termination for terminated employees, -1 for everyone else
+DERIVED_COLUMNS = ["TenureYears"]
+
+CATEGORY_COLUMNS = [
+    "Department", "ManagerName", "RecruitmentSource", "PerformanceScore",
+    "EmploymentStatus", "TermReason", "Sex", "MaritalDesc",
+]
+
+# CSVs bigger than this are streamed in chunks of CSV_CHUNK_ROWS rows
+CSV_CHUNK_BYTES = int(os.environ.get("HR_CSV_CHUNK_MB", "256")) * 1024 * 1024
+CSV_CHUNK_ROWS = 500_000
+
+
+def load_dataset(path=DATA_PATH):
+    path = Path(path)
+    stat = path.stat()  # FileNotFoundError propagates to the caller
+
+    sidecar, meta_path = sidecar_paths(path)
+    meta = _read_meta(meta_path)
+    if HAS_PARQUET and meta is not None and sidecar.exists():
+        if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+            return pd.read_parquet(sidecar)
+        # Touched or copied but not edited: the content hash still matches
+        if meta["size"] == stat.st_size and meta["sha256"] == file_hash(path):
+            _write_meta(meta_path, stat, meta["sha256"])
+            return pd.read_parquet(sidecar)
+
+    df = read_csv(path, chunked=stat.st_size > CSV_CHUNK_BYTES)
+    if HAS_PARQUET:
+        write_sidecar(df, path, stat)
+    return df
+
+
+def sidecar_paths(path):
+    path = Path(path)
+    return path.with_name(path.name + ".parquet"), path.with_name(path.name + ".meta.json")
+
+
+def read_csv(path, chunked=False):
+    options = dict(usecols=USE_COLUMNS, dtype=DTYPES, encoding="utf-8-sig")
+    if not chunked:
+        return _prepare(pd.read_csv(path, **options))
+
+    # Stream: each chunk is parsed and compacted before the next one is read,
+    # and the compact chunks are joined without widening them again, so
+    # memory peaks at about twice the compact frame, not at the parsed file
+    chunks = [_prepare(chunk) for chunk in pd.read_csv(path, chunksize=CSV_CHUNK_ROWS, **options)]
+    return concat_compact(chunks)
+
+
+def _prepare(df):
+    # PRE-PROCESSING
+    for col in DATE_COLUMNS:
+        df[col] = pd.to_datetime(df[col], format="%m/%d/%Y", errors='coerce')
+    return compact_frame(df)
+
+
+# --- COMPACTION ---
+
+def compact_frame(df):
+    df = df[[col for col in USE_COLUMNS + DERIVED_COLUMNS if col in df.columns]].copy()
+
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            # e.g. "Production       " and "M " are stored once, trimmed
+            values = df[col].astype("category")
+            stripped = values.cat.categories.str.strip()
+            if stripped.is_unique:
+                df[col] = values.cat.rename_categories(stripped)
+            else:
+                # "M" and "M " both present: strip the values, then re-categorize
+                df[col] = values.astype(str).str.strip().astype("category")
+
+    if "Employee_Name" in df.columns:
+        df["Employee_Name"] = df["Employee_Name"].str.strip()
+
+    if "TenureYears" not in df.columns and {"Termd", *DATE_COLUMNS} <= set(df.columns):
+        df["TenureYears"] = tenure_years(df)
+
+    for col in df.select_dtypes(include="number").columns:
+        df[col] = _narrow(df[col].to_numpy())
+    return df
+
+
+def _narrow(values):
+    # Floats holding only whole numbers (no blanks) become integers; other
+    # floats narrow only where float32 holds every value exactly: averages
+    # such as Avg Engagement would otherwise round differently
+    if values.dtype.kind == "f":
+        if np.isfinite(values).all() and np.array_equal(values, np.trunc(values)):
+            values = values.astype(np.int64)
+        else:
+            narrow = values.astype(np.float32)
+            return narrow if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True) else values
+    return pd.to_numeric(values, downcast="integer")
+
+
+def tenure_years(df):
+    days = (df["DateofTermination"] - df["DateofHire"]).dt.days.to_numpy(dtype=float)
+    years = np.trunc(days / 365)
+    left = (df["Termd"].to_numpy() == 1) & (years >= 0)
+    return np.where(left, years, -1).astype(np.int64)
+
+
+def concat_compact(chunks):
+    # Frames that each went through compact_frame, joined column by column
+    # so nothing is widened back to strings or compacted again: categories
+    # are unioned (the first frame's codes unchanged), and only a numeric
+    # column downcast differently between chunks (int8 and int16 absences)
+    # is narrowed again, to what compacting the whole frame would give.
+    columns = {}
+    for col in chunks[0].columns:
+        parts = [chunk[col] for chunk in chunks]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[col] = pd.api.types.union_categoricals(parts)
+        elif len({part.dtype for part in parts}) > 1 and all(part.dtype.kind in "iuf" for part in parts):
+            columns[col] = _narrow(np.concatenate([part.to_numpy(dtype=np.float64) for part in parts]))
+        else:
+            columns[col] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns, copy=False)
+
+
+def append_compact(df, rows):
+    # df followed by rows, both already through compact_frame: only the new
+    # rows were processed
+    return concat_compact([df, rows])
+
+
+def memory_report(df):
+    usage = df.memory_usage(index=False, deep=True)
+    report = pd.DataFrame({"dtype": df.dtypes.astype(str), "bytes": usage})
+    report["share"] = report["bytes"] / report["bytes"].sum()
+    return report.sort_values("bytes", ascending=False)
+
+
+def file_hash(path, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_sidecar(df, path, stat):
+    sidecar, meta_path = sidecar_paths(path)
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, sidecar)
+        _write_meta(meta_path, stat, file_hash(path))
+    except OSError as e:
+        # Read-only deployments just go without the sidecar
+        print(f"Warning: could not write {sidecar.name}: {e}")
+
+
+def _read_meta(meta_path):
+    try:
+        meta = json.loads(meta_path.read_text())
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get("version") == SIDECAR_VERSION else None
+
+
+def _write_meta(meta_path, stat, sha256):
+    meta_path.write_text(json.dumps({
+        "version": SIDECAR_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+    }))
+
+
+if __name__ == "__main__":
+    raw = pd.read_csv(DATA_PATH)
+    compact = load_dataset()
+    for label, frame in [("Raw CSV (all columns)", raw), ("Compacted", compact)]:
+        report = memory_report(frame)
+        print(f"\n{label}: {len(frame.columns)} columns, {report['bytes'].sum() / 1024:.1f} KiB")
+        print(report.to_string(formatters={"share": "{:.1%}".format}))
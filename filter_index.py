@@ -0,0 +1,89 @@
+# Bitmap index over the sidebar filter columns.
+#
+# Built once when the data is loaded: every distinct value of every filter
+# column gets a precomputed bitset (one bit per row, packed 8 rows per byte).
+# Applying the sidebar filters is then a handful of bitwise ORs (values within
+# a column) and ANDs (across columns) instead of copying the frame and
+# rescanning each column with isin().
+
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    def __init__(self, df, columns):
+        self.columns = list(columns)
+        self.n_rows = len(df)
+        self.bitmaps = {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col])
+            self.bitmaps[col] = {
+                value: np.packbits(codes == i) for i, value in enumerate(uniques)
+            }
+
+    def appended(self, new_rows):
+        # Index over the current rows followed by new_rows. Only the new rows
+        # are scanned; self is left untouched for readers still using it.
+        index = object.__new__(FilterIndex)
+        index.columns = self.columns
+        index.n_rows = self.n_rows + len(new_rows)
+        index.bitmaps = {}
+        for col in self.columns:
+            codes, uniques = pd.factorize(new_rows[col])
+            new_bits = {value: codes == i for i, value in enumerate(uniques)}
+            old_bits = self.bitmaps[col]
+            index.bitmaps[col] = {
+                value: _append_bits(
+                    old_bits.get(value, np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)),
+                    self.n_rows,
+                    new_bits.get(value, np.zeros(len(new_rows), dtype=bool)),
+                )
+                for value in list(old_bits) + [v for v in new_bits if v not in old_bits]
+            }
+        return index
+
+    def values(self, col):
+        return list(self.bitmaps[col].keys())
+
+    def bitset(self, selections):
+        # selections maps column -> list of selected values.
+        # An empty selection means "no filter" on that column.
+        # Returns None when nothing is filtered at all.
+        result = None
+        for col, selected in selections.items():
+            if not selected:
+                continue
+            bitmaps = self.bitmaps[col]
+            col_bits = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+            for value in selected:
+                bits = bitmaps.get(value)
+                if bits is not None:
+                    np.bitwise_or(col_bits, bits, out=col_bits)
+            if result is None:
+                result = col_bits
+            else:
+                np.bitwise_and(result, col_bits, out=result)
+        return result
+
+    def mask(self, selections):
+        bits = self.bitset(selections)
+        if bits is None:
+            return None
+        return np.unpackbits(bits, count=self.n_rows).view(bool)
+
+    def positions(self, selections):
+        # Row positions matching the selections, or None for "all rows"
+        mask = self.mask(selections)
+        if mask is None:
+            return None
+        return np.flatnonzero(mask)
+
+
+def _append_bits(packed, n_bits, new_bits):
+    # Append booleans to a packed bitset holding n_bits bits
+    used = n_bits % 8
+    if used == 0:
+        return np.concatenate([packed, np.packbits(new_bits)])
+    # Re-pack only the partially filled last byte together with the new bits
+    tail = np.unpackbits(packed[-1:])[:used].view(bool)
+    return np.concatenate([packed[:-1], np.packbits(np.concatenate([tail, new_bits]))])
@@ -0,0 +1,182 @@
+# Live dataset with hot reload of the HR export.
+#
+# HRStore holds the current snapshot of the data: the frame plus the filter
+# index and cube built from it. Snapshots are never modified; a change builds
+# a new one and swaps it in, so a session that is halfway through a render
+# keeps a consistent view.
+#
+# DataWatcher polls the CSV in a background thread:
+#   - rows appended to the end (new hires, the nightly delta) are parsed on
+#     their own and folded into the frame, index and cube, so the work
+#     depends on the size of the change, not the size of the file;
+#   - any other edit reloads the file and diffs the old and new cubes.
+# Either way the store records which filter cells changed, so sessions (and
+# the shared result cache) only refresh when their current filters can see
+# the change.
+
+import hashlib
+import io
+import logging
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from cube import HRCube
+from data_loader import append_compact, load_dataset, read_csv
+from filter_index import FilterIndex
+
+logger = logging.getLogger(__name__)
+
+# Bytes before the last consumed offset that must be unchanged for a change
+# to count as a pure append
+TAIL_CHECK_BYTES = 64 * 1024
+
+
+class Snapshot:
+    def __init__(self, df, filter_index, cube, version):
+        self.df = df
+        self.filter_index = filter_index
+        self.cube = cube
+        self.version = version
+
+
+class HRStore:
+    def __init__(self, df, dims, history=64):
+        self.dims = list(dims)
+        self.current = self._build(df, version=0)
+        self.listeners = []
+        # (version, index over the changed cells)
+        self._changes = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def _build(self, df, version):
+        if df.empty:
+            return Snapshot(df, None, None, version)
+        return Snapshot(df, FilterIndex(df, self.dims), HRCube(df, self.dims), version)
+
+    def append_rows(self, rows):
+        if rows.empty:
+            return
+        with self._lock:
+            old = self.current
+            if old.cube is None:
+                return self._publish(self._build(rows, old.version + 1), rows[self.dims])
+            delta = HRCube(rows, self.dims)
+            snapshot = Snapshot(
+                append_compact(old.df, rows),
+                old.filter_index.appended(rows),
+                old.cube.merge(delta),
+                old.version + 1,
+            )
+            self._publish(snapshot, delta.cells)
+
+    def replace(self, df):
+        with self._lock:
+            old = self.current
+            snapshot = self._build(df, old.version + 1)
+            if old.cube is not None and snapshot.cube is not None:
+                changed = old.cube.changed_cells(snapshot.cube)
+            else:
+                # Data appeared or disappeared: every cell changed
+                cube = snapshot.cube or old.cube
+                changed = None if cube is None else cube.cells
+            self._publish(snapshot, changed)
+
+    def _publish(self, snapshot, changed_cells):
+        self.current = snapshot
+        changed = None if changed_cells is None else FilterIndex(changed_cells, self.dims)
+        self._changes.append((snapshot.version, changed))
+        logger.info("HR data v%d: %d rows, %d changed filter cells",
+                    snapshot.version, len(snapshot.df), 0 if changed is None else changed.n_rows)
+        for listener in self.listeners:
+            listener(changed)
+
+    def affects(self, since_version, selections):
+        # Did anything published after since_version touch rows matching selections?
+        changes = [c for c in list(self._changes) if c[0] > since_version]
+        if not changes:
+            return False
+        if changes[0][0] != since_version + 1:
+            return True  # older than the kept history: assume yes
+        return any(cells_match(changed, selections) for _, changed in changes)
+
+
+def cells_match(changed, selections):
+    if changed is None or changed.n_rows == 0:
+        return False
+    mask = changed.mask(selections)
+    return mask is None or bool(mask.any())
+
+
+class DataWatcher(threading.Thread):
+    def __init__(self, store, path, interval):
+        super().__init__(name="hr-data-watcher", daemon=True)
+        self.store = store
+        self.path = Path(path)
+        self.interval = interval
+        self._remember(self._stat())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:
+                # Half-written export, parse error...: try again next time
+                logger.exception("Reloading %s failed", self.path)
+
+    def poll(self):
+        stat = self._stat()
+        if stat is None or (stat.st_size, stat.st_mtime_ns) == (self._size, self._mtime_ns):
+            return
+
+        if self._is_append(stat):
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                added = f.read(stat.st_size - self._offset)
+            # Only whole lines; a half-written last line is picked up next time
+            complete = added[:added.rfind(b"\n") + 1]
+            if complete:
+                self.store.append_rows(read_csv(io.BytesIO(self._header + complete)))
+            self._offset += len(complete)
+            self._tail = self._tail_digest(self._offset)
+            self._size, self._mtime_ns = stat.st_size, stat.st_mtime_ns
+        else:
+            self.store.replace(load_dataset(self.path))
+            self._remember(stat)
+
+    def _stat(self):
+        try:
+            return self.path.stat()
+        except FileNotFoundError:
+            return None
+
+    def _remember(self, stat):
+        self._size = stat.st_size if stat else -1
+        self._mtime_ns = stat.st_mtime_ns if stat else -1
+        self._offset = stat.st_size if stat else 0
+        self._header = self._read_header() if stat else b""
+        self._tail = self._tail_digest(self._offset) if stat else None
+
+    def _is_append(self, stat):
+        return (
+            self._tail is not None
+            and stat.st_size > self._offset
+            and self._read_header() == self._header
+            and self._tail_digest(self._offset) == self._tail
+        )
+
+    def _read_header(self):
+        with open(self.path, "rb") as f:
+            return f.readline()
+
+    def _tail_digest(self, offset):
+        start = max(0, offset - TAIL_CHECK_BYTES)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return hashlib.sha256(f.read(offset - start)).hexdigest()
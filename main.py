@@ -1,12 +1,37 @@
 # Run the app
 # shiny run --reload main.py
 
-from shiny import App, render, ui, reactive
+# Startup phases are timed from here on (see startup.py)
+from startup import Timeline
+timeline = Timeline()
+
+from shiny import App, render, ui, reactive, req
+from shiny.types import SilentCancelOutputException, SilentException
 import pandas as pd
 import faicons as fa
-import plotly.express as px
 from shinywidgets import output_widget, render_widget
 from pathlib import Path
+import os
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+from data_loader import DATA_PATH, load_dataset
+from shared_store import STORE_DIR, load_shared
+from result_cache import ResultCache, make_filter_key
+from aggregates import HISTOGRAM_BINS
+from backends import PandasBackend, from_environment
+from hot_reload import HRStore, DataWatcher, cells_match
+from telemetry import Telemetry
+import charts
+from starlette.routing import Route
+
+timeline.mark("imports")
+
+logger = logging.getLogger(__name__)
 
 # --- THEME CONFIGURATION ---
 theme_colors = [
@@ -19,133 +44,486 @@ theme_colors = [
     "#191C24"  # Dark/Black
 ]
 
+# FAST START (HR_FAST_START=1), for workers started on demand: the page is
+# served before the dataset is loaded. Loading runs in a background thread,
+# sessions fill in once it's done, and the About page is only built when
+# it's first opened. Off, everything is ready before the first request.
+FAST_START = os.environ.get("HR_FAST_START", "0") == "1"
+
 # 1. LOAD THE DATA
-try:
-    df = pd.read_csv("HRDataset_v14.csv")
-    # PRE-PROCESSING
-    df['DateofHire'] = pd.to_datetime(df['DateofHire'], format="%m/%d/%Y", errors='coerce')
-    df['DateofTermination'] = pd.to_datetime(df['DateofTermination'], format="%m/%d/%Y", errors='coerce')
-except FileNotFoundError:
-    df = pd.DataFrame()
-    print("Error: HRDataset_v14.csv not found.")
+# (typed columns, reused from the Parquet sidecar when the CSV is unchanged;
+# with HR_SHARED_STORE set, every worker maps one shared read-only copy).
+# With HR_BACKEND=duckdb nothing is loaded: queries run against Parquet files.
+QUERY_BACKEND = os.environ.get("HR_BACKEND", "pandas")
+
+def read_data():
+    try:
+        if QUERY_BACKEND != "pandas":
+            return pd.DataFrame()
+        return load_dataset() if STORE_DIR is None else load_shared(STORE_DIR)
+    except FileNotFoundError:
+        print("Error: HRDataset_v14.csv not found.")
+        return pd.DataFrame()
+    except ValueError as e:
+        # Unparseable export: start empty rather than not at all
+        print(f"Error: could not read {DATA_PATH}: {e}")
+        return pd.DataFrame()
+
+df = pd.DataFrame() if FAST_START else read_data()
+
+# Sidebar filter columns, indexed once so filtering never copies the frame.
+# KPIs and bar/pie charts are rolled up from a cube over the same columns
+# instead of the rows; the store keeps both up to date as the CSV changes.
+# HR_CUBE_CHECK=1 also recomputes every answer from the rows and logs any mismatch.
+FILTER_COLUMNS = ["Department", "RecruitmentSource", "MaritalDesc", "Sex"]
+store = HRStore(df, FILTER_COLUMNS)
+CUBE_CHECK = os.environ.get("HR_CUBE_CHECK", "0") == "1"
+
+# QUERY BACKEND: where KPIs, chart tables and box plots are computed (see
+# backends.py). "pandas" answers from the store above; "duckdb" pushes the
+# filters and aggregations down as SQL over HR_PARQUET_PATH.
+# (In fast-start mode it answers from the empty store until the data is in.)
+backend = PandasBackend(store, CUBE_CHECK) if FAST_START else from_environment(store, CUBE_CHECK)
+
+# Box plots: "server" sends per-department quartiles plus at most
+# HR_BOX_MAX_OUTLIERS outlier points; "browser" ships every row to px.box.
+BOX_STATS = os.environ.get("HR_BOX_STATS", "server")
+BOX_MAX_OUTLIERS = int(os.environ.get("HR_BOX_MAX_OUTLIERS", "500"))
+
+# Manager leaderboard: rows per page and the sort keys offered
+MANAGER_PAGE_SIZE = int(os.environ.get("HR_MANAGER_PAGE_SIZE", "15"))
+MANAGER_SORT_KEYS = {
+    "PerfScoreNum": "Avg Performance",
+    "EmpSatisfaction": "Avg Satisfaction",
+    "Headcount": "Headcount",
+    "ManagerName": "Name",
+}
+
+# Filter edits are applied once they've been quiet for this long
+FILTER_DEBOUNCE = int(os.environ.get("HR_FILTER_DEBOUNCE_MS", "400")) / 1000
+
+# Heavy charts (recruitment, both box plots, the manager leaderboard) are
+# computed on HR_RENDER_THREADS threads, off the event loop every session
+# shares, so one slow filter doesn't stall the others. 0 computes them on
+# the loop. Threads, not processes: they work on the store and cache that
+# live in this process and return Plotly traces without pickling.
+RENDER_THREADS = int(os.environ.get("HR_RENDER_THREADS", "4"))
+render_pool = ThreadPoolExecutor(RENDER_THREADS, thread_name_prefix="hr-render") if RENDER_THREADS > 0 else None
+
+# Chart updates go out as compact widget messages: orjson-encoded, numeric
+# arrays as binary typed arrays (see charts.py; HR_WIDGET_BINARY_MIN)
+charts.use_fast_json()
+# Charts load the Plotly widget script from one cached URL instead of each
+# carrying it in its state; HR_WIDGET_SCRIPT=inline embeds it as Plotly does
+WIDGET_SCRIPT = os.environ.get("HR_WIDGET_SCRIPT", "shared")
+
+# Filter results, KPIs and chart aggregates shared by every session
+shared_cache = ResultCache(
+    max_entries=int(os.environ.get("HR_CACHE_MAX_ENTRIES", "512")),
+    max_bytes=int(os.environ.get("HR_CACHE_MAX_MB", "128")) * 1024 * 1024,
+)
+
+def key_selections(key):
+    # Filter key (see make_filter_key) -> column -> selected values
+    dept, recruit, marital, sex = key
+    return {
+        "Department": dept,
+        "RecruitmentSource": recruit,
+        "MaritalDesc": marital,
+        "Sex": [] if sex == "All" else [sex],
+    }
+
+# Drop the cached results a data change can affect; the rest stay warm.
+# Facet counts also look outside the current selection, so they always go.
+def _invalidate_cache(changed):
+    shared_cache.invalidate(
+        lambda key: key[1] == "facets" or cells_match(changed, key_selections(key[0]))
+    )
+
+store.listeners.append(_invalidate_cache)
+
+# TELEMETRY: run counts, timings and payload sizes per output at /metrics
+# (HR_TELEMETRY=0 turns it off). Renders slower than HR_SLOW_RENDER_MS are
+# logged with their session id.
+telemetry = Telemetry(
+    enabled=os.environ.get("HR_TELEMETRY", "1") == "1",
+    slow_ms=float(os.environ.get("HR_SLOW_RENDER_MS", "0")),
+)
+telemetry.gauge("hr_cache_entries", "Entries in the shared result cache", lambda: shared_cache.stats()["entries"])
+telemetry.gauge("hr_cache_bytes", "Estimated size of the shared result cache", lambda: shared_cache.stats()["bytes"])
+telemetry.gauge("hr_cache_hit_ratio", "Shared result cache hits per lookup", lambda: shared_cache.stats()["hit_rate"])
+telemetry.gauge("hr_data_rows", "Rows in the current dataset", lambda: backend.n_rows())
+telemetry.gauge("hr_data_version", "Version of the current dataset", lambda: store.version)
+
+# HOT RELOAD: check the CSV for changes every HR_RELOAD_SECONDS (0 turns it off).
+# Appended rows are folded in incrementally; other edits reload the file.
+# Workers on a shared store pick up changes when they restart instead.
+RELOAD_SECONDS = float(os.environ.get("HR_RELOAD_SECONDS", "10"))
+
+def watch(df):
+    if RELOAD_SECONDS > 0 and STORE_DIR is None and not df.empty:
+        DataWatcher(store, DATA_PATH, RELOAD_SECONDS).start()
+
+# Set once the dataset is in (straight away unless FAST_START)
+data_ready = threading.Event()
+
+def load_in_background():
+    # FAST START: swap the real data (or the DuckDB backend) in, then let
+    # the waiting sessions render. If loading fails they are released all
+    # the same and show an empty dashboard.
+    global backend
+    try:
+        data = read_data()
+        if QUERY_BACKEND == "pandas":
+            store.replace(data)
+        else:
+            backend = from_environment(store, CUBE_CHECK)
+        watch(data)
+    finally:
+        timeline.mark("data")
+        data_ready.set()
+
+if FAST_START:
+    threading.Thread(target=load_in_background, name="hr-data-loader", daemon=True).start()
+else:
+    watch(df)
+    timeline.mark("data")
+    data_ready.set()
 
 # Helper for filters
 def get_choices(col):
-    if df.empty:
+    return backend.choices(col)
+
+# FILTER FACETS: every option shows how many employees it would match given
+# the other filters ("Sales (31)"); options matching nobody are dimmed.
+# Selected items are shown without the count.
+SELECTIZE_FACETS = {
+    "render": ui.js_eval("""{
+        option: function(item, escape) {
+            var empty = / \\(0\\)$/.test(item.label);
+            return '<div class="option' + (empty ? ' facet-empty' : '') + '">' + escape(item.label) + '</div>';
+        },
+        item: function(item, escape) {
+            return '<div class="item">' + escape(item.label.replace(/ \\([\\d,]+\\)$/, '')) + '</div>';
+        }
+    }"""),
+}
+FACET_INPUTS = {"Department": "dept_filter", "RecruitmentSource": "recruit_filter", "MaritalDesc": "marital_filter"}
+
+def facet_label(value, count):
+    return f"{value} ({count:,})"
+
+# --- KPI TEXTS AND CHARTS ---
+# What the value boxes and charts show for a summary, as plain functions so
+# that prerender.py draws exactly what a session does.
+
+KPI_LABELS = {
+    "kpi_headcount": "Active Headcount",
+    "kpi_attrition": "Attrition Rate",
+    "kpi_engagement": "Avg Engagement",
+    "kpi_satisfaction": "Avg Satisfaction",
+    "kpi_performance": "High Performers",
+}
+
+CHART_TITLES = {
+    "plot_attrition_dept": "Attrition by Department",
+    "plot_term_reasons": "Top Reasons for Termination",
+    "plot_tenure": "When do employees leave?",
+    "plot_recruitment": "Recruitment Source vs. Retention",
+    "plot_headcount_trend": "Headcount & Attrition Over Time",
+    "plot_perf_dist": "Performance Score Distribution",
+    "plot_prod_sat_matrix": "Engagement Survey by Department",
+    "plot_attendance_perf": "Absences Distribution by Department",
+    "plot_manager_effect": "Manager Effectiveness",
+    "plot_salary_dist": "Salary Distribution",
+}
+
+def kpi_texts(stats):
+    # Value box texts; stats None means nothing matches the filters
+    if stats is None:
+        return {"kpi_headcount": "0", "kpi_attrition": "0%", "kpi_engagement": "0",
+                "kpi_satisfaction": "0", "kpi_performance": "0%"}
+    return {
+        "kpi_headcount": f"{stats['active']}",
+        "kpi_attrition": f"{stats['terminated'] / stats['n_rows']:.1%}",
+        "kpi_engagement": f"{stats['engagement_mean']:.2f} / 5.0",
+        "kpi_satisfaction": f"{stats['satisfaction_mean']:.2f} / 5.0",
+        "kpi_performance": f"{stats['high_performers'] / stats['n_rows']:.1%}",
+    }
+
+# Layout of every chart, applied once when its widget is created
+CHART_LAYOUTS = {
+    "plot_attrition_dept": dict(
+        showlegend=False, 
+        yaxis={'categoryorder':'total ascending', 'title': {'text': 'Department'}},
+        xaxis_title="Count",
+        coloraxis=charts.colorscale(theme_colors[0], theme_colors[1]),
+        margin=dict(l=0, r=0, t=10, b=0) 
+    ),
+    "plot_term_reasons": dict(
+        showlegend=False, 
+        yaxis={'categoryorder':'total ascending', 'title': {'text': 'Reason'}},
+        xaxis_title="Count",
+        coloraxis=charts.colorscale(theme_colors[2], theme_colors[0]),
+        margin=dict(l=0, r=0, t=10, b=0)
+    ),
+    "plot_tenure": dict(
+        bargap=0.2, 
+        showlegend=False,
+        xaxis_title="Label",
+        yaxis_title="Count",
+        margin=dict(l=0, r=0, t=10, b=0)
+    ),
+    "plot_recruitment": dict(
+        barmode="relative",
+        xaxis_title="Count",
+        yaxis={'categoryorder':'total ascending', 'title': {'text': 'RecruitmentSource'}},
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1,
+                    title=dict(text="EmploymentStatus"))
+    ),
+    "plot_headcount_trend": dict(
+        barmode="group",
+        xaxis_title=None,
+        yaxis_title="Employees",
+        yaxis2=dict(title=dict(text="Monthly Attrition"), overlaying="y", side="right",
+                    tickformat=".0%", rangemode="tozero", showgrid=False),
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    ),
+    "plot_perf_dist": dict(
+        piecolorway=theme_colors,
+        margin=dict(l=0, r=0, t=20, b=0)
+    ),
+    # Boxplot of EngagementSurvey by Department
+    "plot_prod_sat_matrix": dict(
+        boxmode="overlay",
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        xaxis_title=None, 
+        xaxis_tickangle=45, # Rotate x-axis labels: Department names are long
+        yaxis_title="Engagement Survey Score",
+        showlegend=False # Legend hidden as color is by x-axis variable
+    ),
+    # Boxplot of Absences by Department
+    "plot_attendance_perf": dict(
+        boxmode="overlay",
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        xaxis_title=None, 
+        xaxis_tickangle=45,
+        yaxis_title="Number of Absences",
+        showlegend=False
+    ),
+    "plot_manager_effect": dict(
+        barmode="group", height=600,
+        xaxis_title="Score",
+        yaxis_title="ManagerName",
+        margin=dict(l=0, r=0, t=10, b=0),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0,
+                    title=dict(text="Metric"))
+    ),
+    "plot_salary_dist": dict(
+        bargap=0.05,
+        showlegend=False,
+        xaxis=dict(title=dict(text="Salary"), tickprefix="$", tickformat=","),
+        yaxis_title="Count",
+        margin=dict(l=0, r=0, t=10, b=0)
+    ),
+}
+
+# Charts drawn from the summary alone (no row access)
+SUMMARY_CHARTS = ["plot_attrition_dept", "plot_term_reasons", "plot_tenure", "plot_recruitment",
+                  "plot_headcount_trend", "plot_perf_dist", "plot_salary_dist"]
+
+def summary_chart(name, stats):
+    # (traces, layout changes) for one of SUMMARY_CHARTS
+    def table(key):
+        return None if stats is None else stats[key]
+
+    if name == "plot_attrition_dept":
+        return charts.count_bars(table("attrition_dept"), "Department"), None
+    if name == "plot_term_reasons":
+        return charts.count_bars(table("term_reasons"), "Reason"), None
+    if name == "plot_tenure":
+        tenure_counts = table("tenure")
+        # Force Plotly to respect the numerical sort order
+        order = [] if tenure_counts is None else tenure_counts['Label'].tolist()
+        return (charts.tenure_bars(tenure_counts, theme_colors[1]),
+                dict(xaxis=dict(categoryorder="array", categoryarray=order)))
+    if name == "plot_recruitment":
+        return charts.recruitment_bars(table("recruitment"), theme_colors), None
+    if name == "plot_headcount_trend":
+        return charts.trend_traces(table("trend"), theme_colors), None
+    if name == "plot_perf_dist":
+        return charts.score_pie(table("perf_dist")), None
+    if name == "plot_salary_dist":
+        # From the cube's histogram bins (aggregates.HISTOGRAM_BINS)
+        return charts.histogram_bars(
+            table("hist_Salary"), HISTOGRAM_BINS["Salary"], "Salary", theme_colors[0], prefix="$"
+        ), None
+    raise KeyError(name)
+
+# Engagement / absences box plots: chart -> (cache name, value column, hover columns)
+BOX_CHARTS = {
+    "plot_prod_sat_matrix": ("box_engagement", "EngagementSurvey", ["Employee_Name", "ManagerName", "EmpSatisfaction"]),
+    "plot_attendance_perf": ("box_absences", "Absences", ["Employee_Name", "ManagerName"]),
+}
+
+def box_chart(name, selections, cached=lambda key, compute: compute()):
+    # Per-department statistics from the server, or every row through px.box
+    # with HR_BOX_STATS=browser
+    cache_name, value_col, hover_cols = BOX_CHARTS[name]
+    if BOX_STATS == "server":
+        box = cached(cache_name, lambda: backend.box_stats(
+            selections, value_col, "Department", hover_cols, BOX_MAX_OUTLIERS
+        ))
+        return charts.box_traces(box, value_col, hover_cols, theme_colors)
+    dff = backend.rows(selections, ["Department", value_col, *hover_cols])
+    if dff.empty:
         return []
-    return sorted(list(df[col].dropna().unique()))
+    import plotly.express as px  # only this mode needs it: imported on first use
+    fig = px.box(
+        dff, 
+        x="Department", 
+        y=value_col, 
+        color="Department", # Color by Department for visual distinction
+        points="outliers", # Only show outliers as points
+        hover_data=hover_cols,
+        color_discrete_sequence=theme_colors
+    )
+    return list(fig.data)
+
+def manager_chart(page):
+    # (traces, layout changes) for one page of the manager leaderboard
+    if page is not None and page.empty:
+        page = None
+    # Ranked top to bottom (horizontal bars are drawn bottom-up)
+    manager_order = [] if page is None else page['ManagerName'].tolist()[::-1]
+    return (
+        charts.manager_bars(page, [theme_colors[1], theme_colors[2]]),
+        # --- ENFORCE CUSTOM ORDERING ---
+        dict(yaxis=dict(categoryorder="array", categoryarray=manager_order)),
+    )
 
 # --- PART A: DEFINE THE "ABOUT" PAGE CONTENT ---
-about_page_content = ui.div(
-    ui.br(), 
+# (a function: in fast-start mode it is only built when the page is opened)
+def about_page():
+    return ui.div(
+        ui.br(), 
 
-    # 1. Research Authors Section
-    ui.h3(fa.icon_svg("users"), " Research Authors", class_="mb-4"),
-    ui.row(
-        ui.column(4,
-            ui.card(
-                # Cyan - CENTERED TEXT FIX
-                ui.card_header(
-                    ui.div("Khinje Louis P. Curugan", class_="w-100 text-center"), 
-                    style="background-color: #0DCAF0; color: white;", 
-                    class_="fs-5"
-                ),
-                ui.div(
-                    ui.h6("BSCS Student", class_="text-center fw-bold"),
+        # 1. Research Authors Section
+        ui.h3(fa.icon_svg("users"), " Research Authors", class_="mb-4"),
+        ui.row(
+            ui.column(4,
+                ui.card(
+                    # Cyan - CENTERED TEXT FIX
+                    ui.card_header(
+                        ui.div("Khinje Louis P. Curugan", class_="w-100 text-center"), 
+                        style="background-color: #0DCAF0; color: white;", 
+                        class_="fs-5"
+                    ),
                     ui.div(
-                        ui.img(src="BSCS3_Khin.jpg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
-                        class_="d-flex justify-content-center my-3"
+                        ui.h6("BSCS Student", class_="text-center fw-bold"),
+                        ui.div(
+                            ui.img(src="BSCS3_Khin.jpg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
+                            class_="d-flex justify-content-center my-3"
+                        ),
+                        ui.hr(),
+                        ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
+                        ui.p("College of Information and Computing", class_="text-center small mb-1"),
+                        ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
+                        ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
+                        class_="p-3"
+                    ),
+                )
+            ),
+            ui.column(4,
+                ui.card(
+                    # Magenta (Primary) - CENTERED TEXT FIX
+                    ui.card_header(
+                        ui.div("Rui Manuel A. Palabon", class_="w-100 text-center"),
+                        style="background-color: #AF1763; color: white;", 
+                        class_="fs-5"
                     ),
-                    ui.hr(),
-                    ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
-                    ui.p("College of Information and Computing", class_="text-center small mb-1"),
-                    ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
-                    ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
-                    class_="p-3"
-                ),
-            )
-        ),
-        ui.column(4,
-            ui.card(
-                # Magenta (Primary) - CENTERED TEXT FIX
-                ui.card_header(
-                    ui.div("Rui Manuel A. Palabon", class_="w-100 text-center"),
-                    style="background-color: #AF1763; color: white;", 
-                    class_="fs-5"
-                ),
-                ui.div(
-                    ui.h6("BSCS Student", class_="text-center fw-bold"),
                     ui.div(
-                        ui.img(src="BSCS3_Rui.jpg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
-                        class_="d-flex justify-content-center my-3"
+                        ui.h6("BSCS Student", class_="text-center fw-bold"),
+                        ui.div(
+                            ui.img(src="BSCS3_Rui.jpg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
+                            class_="d-flex justify-content-center my-3"
+                        ),
+                        ui.hr(),
+                        ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
+                        ui.p("College of Information and Computing", class_="text-center small mb-1"),
+                        ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
+                        ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
+                        class_="p-3"
+                    ),
+                )
+            ),
+            ui.column(4,
+                ui.card(
+                    # Blue - CENTERED TEXT FIX
+                    ui.card_header(
+                        ui.div("Aj Ian L. Resurreccion", class_="w-100 text-center"),
+                        style="background-color: #0D6EFD; color: white;", 
+                        class_="fs-5"
                     ),
-                    ui.hr(),
-                    ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
-                    ui.p("College of Information and Computing", class_="text-center small mb-1"),
-                    ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
-                    ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
-                    class_="p-3"
-                ),
-            )
-        ),
-        ui.column(4,
-            ui.card(
-                # Blue - CENTERED TEXT FIX
-                ui.card_header(
-                    ui.div("Aj Ian L. Resurreccion", class_="w-100 text-center"),
-                    style="background-color: #0D6EFD; color: white;", 
-                    class_="fs-5"
-                ),
-                ui.div(
-                    ui.h6("BSCS Student", class_="text-center fw-bold"),
                     ui.div(
-                        ui.img(src="BSCS3_Ian.jpeg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
-                        class_="d-flex justify-content-center my-3"
+                        ui.h6("BSCS Student", class_="text-center fw-bold"),
+                        ui.div(
+                            ui.img(src="BSCS3_Ian.jpeg", style="width: 150px; height: 150px; object-fit: cover;", class_="rounded-circle border border-3 border-white shadow"),
+                            class_="d-flex justify-content-center my-3"
+                        ),
+                        ui.hr(),
+                        ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
+                        ui.p("College of Information and Computing", class_="text-center small mb-1"),
+                        ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
+                        ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
+                        class_="p-3"
                     ),
-                    ui.hr(),
-                    ui.p("University of Southeastern Philippines", class_="text-center small mb-1"),
-                    ui.p("College of Information and Computing", class_="text-center small mb-1"),
-                    ui.p("BS Computer Science - Major in Data Science", class_="text-center small mb-1"),
-                    ui.p("CSDS 313 Business Intelligence [AY 2025-2026]", class_="text-center small mb-1"),
-                    class_="p-3"
-                ),
-            )
+                )
+            ),
         ),
-    ),
     
-    ui.hr(),
-
-    # 2. Dataset Information Section
-    ui.h3(fa.icon_svg("database"), " About the Dataset", class_="mt-4 mb-3"),
-    ui.card(
-        ui.markdown("""
-        **Dataset:** Human Resources Data Set (Version 14)  
-        **Original Authors:** Dr. Carla Patalano and Dr. Rich Huebner  
-        **License:** CC-BY-NC-ND 4.0 International  
+        ui.hr(),
+
+        # 2. Dataset Information Section
+        ui.h3(fa.icon_svg("database"), " About the Dataset", class_="mt-4 mb-3"),
+        ui.card(
+            ui.markdown("""
+            **Dataset:** Human Resources Data Set (Version 14)  
+            **Original Authors:** Dr. Carla Patalano and Dr. Rich Huebner  
+            **License:** CC-BY-NC-ND 4.0 International  
         
-        **Source:** [Kaggle - Human Resources Data Set](https://www.kaggle.com/datasets/rhuebner/human-resources-data-set)
-        """)
+            **Source:** [Kaggle - Human Resources Data Set](https://www.kaggle.com/datasets/rhuebner/human-resources-data-set)
+            """)
+        )
     )
-)
 
 # --- PART B: DEFINE THE MAIN DASHBOARD CONTENT ---
 dashboard_page_content = ui.layout_sidebar(
     ui.sidebar(
         ui.h4("Filters", class_="mb-3"),
-        ui.input_selectize("dept_filter", "Department", choices=get_choices("Department"), multiple=True, options={"placeholder": "All Departments"}),
-        ui.input_selectize("recruit_filter", "Recruitment Source", choices=get_choices("RecruitmentSource"), multiple=True, options={"placeholder": "All Sources"}),
-        ui.input_selectize("marital_filter", "Marital Status", choices=get_choices("MaritalDesc"), multiple=True, options={"placeholder": "All Statuses"}),
+        ui.input_selectize("dept_filter", "Department", choices=get_choices("Department"), multiple=True, options={"placeholder": "All Departments", **SELECTIZE_FACETS}),
+        ui.input_selectize("recruit_filter", "Recruitment Source", choices=get_choices("RecruitmentSource"), multiple=True, options={"placeholder": "All Sources", **SELECTIZE_FACETS}),
+        ui.input_selectize("marital_filter", "Marital Status", choices=get_choices("MaritalDesc"), multiple=True, options={"placeholder": "All Statuses", **SELECTIZE_FACETS}),
         ui.hr(),
         ui.input_radio_buttons("sex_filter", "Gender", choices=["All"] + get_choices("Sex"), selected="All"),
+        ui.input_switch("apply_mode", "Apply filters on confirm", value=False),
+        ui.panel_conditional(
+            "input.apply_mode",
+            ui.input_action_button("apply_filters", "Apply Filters", icon=fa.icon_svg("filter"), class_="btn-light shadow-sm mb-2", width="100%"),
+        ),
         ui.input_action_button("reset_filters", "Reset Filters", style="background-color: #AF1763; color: white; border: none; font-weight: 600;", width="100%"),
     ),
     
     ui.layout_columns(
-        ui.value_box("Active Headcount", ui.output_text("kpi_headcount"), showcase=fa.icon_svg("users"), theme="brand-purple"),
-        ui.value_box("Attrition Rate", ui.output_text("kpi_attrition"), showcase=fa.icon_svg("user-minus"), theme="brand-blue"),
-        ui.value_box("Avg Engagement", ui.output_text("kpi_engagement"), showcase=fa.icon_svg("chart-line"), theme="brand-teal"),
-        ui.value_box("Avg Satisfaction", ui.output_text("kpi_satisfaction"), showcase=fa.icon_svg("face-smile", style="solid", fill="white", height="1em"), theme="brand-cyan"),
-        ui.value_box("High Performers", ui.output_text("kpi_performance"), showcase=fa.icon_svg("star", style="solid", fill="white", height="1em"), theme="brand-dark-cyan"),
+        ui.value_box(KPI_LABELS["kpi_headcount"], ui.output_text("kpi_headcount"), showcase=fa.icon_svg("users"), theme="brand-purple"),
+        ui.value_box(KPI_LABELS["kpi_attrition"], ui.output_text("kpi_attrition"), showcase=fa.icon_svg("user-minus"), theme="brand-blue"),
+        ui.value_box(KPI_LABELS["kpi_engagement"], ui.output_text("kpi_engagement"), showcase=fa.icon_svg("chart-line"), theme="brand-teal"),
+        ui.value_box(KPI_LABELS["kpi_satisfaction"], ui.output_text("kpi_satisfaction"), showcase=fa.icon_svg("face-smile", style="solid", fill="white", height="1em"), theme="brand-cyan"),
+        ui.value_box(KPI_LABELS["kpi_performance"], ui.output_text("kpi_performance"), showcase=fa.icon_svg("star", style="solid", fill="white", height="1em"), theme="brand-dark-cyan"),
     ),
     
     ui.navset_card_tab(
@@ -153,28 +531,51 @@ dashboard_page_content = ui.layout_sidebar(
             "Retention & Attrition Analysis",
             ui.br(),
             ui.layout_columns(
-                ui.card(ui.card_header("Attrition by Department"), output_widget("plot_attrition_dept"), full_screen=True),
-                ui.card(ui.card_header("Top Reasons for Termination"), output_widget("plot_term_reasons"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_attrition_dept"]), output_widget("plot_attrition_dept"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_term_reasons"]), output_widget("plot_term_reasons"), full_screen=True),
             ),
             ui.br(),
             ui.layout_columns(
-                ui.card(ui.card_header("When do employees leave?"), output_widget("plot_tenure"), full_screen=True),
-                ui.card(ui.card_header("Recruitment Source vs. Retention"), output_widget("plot_recruitment"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_tenure"]), output_widget("plot_tenure"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_recruitment"]), output_widget("plot_recruitment"), full_screen=True),
+            ),
+            ui.br(),
+            ui.layout_columns(
+                ui.card(ui.card_header(CHART_TITLES["plot_headcount_trend"]), output_widget("plot_headcount_trend"), full_screen=True),
             ),
         ),
         ui.nav_panel(
             "Performance & Engagement",
             ui.br(),
             ui.layout_columns(
-                ui.card(ui.card_header("Performance Score Distribution"), output_widget("plot_perf_dist"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_perf_dist"]), output_widget("plot_perf_dist"), full_screen=True),
                 # UPDATED TITLE:
-                ui.card(ui.card_header("Engagement Survey by Department"), output_widget("plot_prod_sat_matrix"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_prod_sat_matrix"]), output_widget("plot_prod_sat_matrix"), full_screen=True),
             ),
             ui.br(),
             ui.layout_columns(
                 # UPDATED TITLE:
-                ui.card(ui.card_header("Absences Distribution by Department"), output_widget("plot_attendance_perf"), full_screen=True),
-                ui.card(ui.card_header("Manager Effectiveness"), output_widget("plot_manager_effect"), full_screen=True),
+                ui.card(ui.card_header(CHART_TITLES["plot_attendance_perf"]), output_widget("plot_attendance_perf"), full_screen=True),
+                ui.card(
+                    ui.card_header(CHART_TITLES["plot_manager_effect"]),
+                    ui.layout_columns(
+                        ui.input_text("mgr_search", None, placeholder="Search managers"),
+                        ui.input_select("mgr_sort", None, choices=MANAGER_SORT_KEYS),
+                        col_widths=[7, 5],
+                    ),
+                    output_widget("plot_manager_effect"),
+                    ui.div(
+                        ui.input_action_button("mgr_prev", None, icon=fa.icon_svg("chevron-left"), class_="btn-light btn-sm"),
+                        ui.output_text("mgr_page_info", inline=True),
+                        ui.input_action_button("mgr_next", None, icon=fa.icon_svg("chevron-right"), class_="btn-light btn-sm"),
+                        class_="d-flex justify-content-between align-items-center",
+                    ),
+                    full_screen=True,
+                ),
+            ),
+            ui.br(),
+            ui.layout_columns(
+                ui.card(ui.card_header(CHART_TITLES["plot_salary_dist"]), output_widget("plot_salary_dist"), full_screen=True),
             ),
         ),
     ),
@@ -261,6 +662,11 @@ app_ui = ui.page_fluid(
         .bslib-value-box svg {
             fill: currentColor; 
         }
+
+        /* 6. FILTER FACETS: options that would match nobody */
+        .facet-empty {
+            opacity: 0.45;
+        }
     """),
     
     # Header Row
@@ -279,13 +685,33 @@ app_ui = ui.page_fluid(
     
     ui.navset_hidden(
         ui.nav_panel("dashboard_view", dashboard_page_content),
-        ui.nav_panel("about_view", about_page_content),
+        ui.nav_panel("about_view", ui.output_ui("about_view_content") if FAST_START else about_page()),
         id="page_nav" 
     )
 )
+timeline.mark("ui")
 
 # 3. DEFINE THE SERVER LOGIC
 def server(input, output, session):
+    telemetry.track_session(session)
+    timeline.mark("first_session")
+
+    # An effect updating a chart or input that fails is logged (and counted
+    # by telemetry.timed as an error) and the output keeps what it showed;
+    # raised out of an effect, the error would end the session. req() still
+    # stops an update silently.
+    def keep_on_error(name):
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper():
+                try:
+                    fn()
+                except (SilentException, SilentCancelOutputException):
+                    raise
+                except Exception:
+                    logger.exception("Updating %s failed in session %s", name, session.id)
+            return wrapper
+        return decorator
 
     # --- PAGE NAVIGATION LOGIC ---
     current_page = reactive.Value("dashboard_view")
@@ -302,299 +728,438 @@ def server(input, output, session):
             ui.update_action_button("btn_about", label="About", icon=fa.icon_svg("circle-info"))
             current_page.set("dashboard_view")
 
+    # FAST START: built the first time the About page is shown (hidden
+    # outputs don't render)
+    if FAST_START:
+        @render.ui
+        def about_view_content():
+            return about_page()
+
+    # --- FILTER STATE ---
+    # Outputs follow applied_key, not the inputs: a burst of selectize edits
+    # is applied once after FILTER_DEBOUNCE of quiet (or only on "Apply
+    # Filters" in apply mode), so each user intent costs one recompute.
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def input_key():
+        return make_filter_key(
+            input.dept_filter(), input.recruit_filter(), input.marital_filter(), input.sex_filter()
+        )
+
+    applied_key = reactive.Value(None)
+    apply_due = reactive.Value(None)
+
+    def apply(key):
+        # reactive.Value only compares identity; an equal key must not recompute
+        apply_due.set(None)
+        with reactive.isolate():
+            if key != applied_key.get():
+                applied_key.set(key)
+
+    @reactive.Effect
+    def _():
+        key = input_key()
+        with reactive.isolate():
+            if applied_key.get() is None:
+                applied_key.set(key)  # first render: nothing to wait for
+            elif not input.apply_mode():
+                # Every edit pushes the deadline back
+                apply_due.set(time.monotonic() + FILTER_DEBOUNCE)
+
+    @reactive.Effect
+    def _():
+        due = apply_due.get()
+        if due is None:
+            return
+        wait = due - time.monotonic()
+        if wait > 0:
+            reactive.invalidate_later(wait)
+            return
+        with reactive.isolate():
+            apply(input_key())
+
+    # Confirm in apply mode; switching apply mode off applies pending edits
+    @reactive.Effect
+    @reactive.event(input.apply_filters, input.apply_mode)
+    def _():
+        apply(input_key())
+
     # --- RESET BUTTON LOGIC ---
+    # One atomic change: the outputs go straight to the unfiltered view, and
+    # the four input updates echoing back then match it and change nothing.
     @reactive.Effect
     @reactive.event(input.reset_filters)
     def _():
+        apply(make_filter_key([], [], [], "All"))
         ui.update_selectize("dept_filter", selected=[])
         ui.update_selectize("recruit_filter", selected=[])
         ui.update_radio_buttons("sex_filter", selected="All")
         ui.update_selectize("marital_filter", selected=[])
 
+    # --- FAST START ---
+    # Until the background load is done, outputs wait (filter_key() holds
+    # them back) and a short timer checks for the data; then they all render
+    # once. Sessions of an eager start skip this.
+    data_loading = reactive.Value(not data_ready.is_set())
+
+    @reactive.Effect
+    def _():
+        if not data_loading.get():
+            return
+        if data_ready.is_set():
+            data_version.set(store.version)
+            data_loading.set(False)
+        else:
+            reactive.invalidate_later(0.1)
+
     # --- REACTIVE DATA FILTERING ---
     @reactive.Calc
-    def filtered_df():
-        if df.empty:
-            return pd.DataFrame()
-        res = df.copy()
+    @telemetry.timed("calc")
+    def filter_key():
+        key = applied_key.get()
+        req(key is not None and not data_loading.get())
+        return key
 
-        if input.dept_filter():
-            res = res[res['Department'].isin(input.dept_filter())]
-        
-        if input.recruit_filter():
-            res = res[res['RecruitmentSource'].isin(input.recruit_filter())]
-        
-        if input.sex_filter() != "All":
-            res = res[res['Sex'] == input.sex_filter()]
-        
-        if input.marital_filter():
-            res = res[res['MaritalDesc'].isin(input.marital_filter())]
-            
-        return res
+    # Look up (or compute once for all sessions) a value for the current filters
+    def cached(name, compute):
+        return shared_cache.get_or_compute((filter_key(), name), compute)
+
+    # The same for a given key, for work done off the event loop
+    def cached_for(key):
+        return lambda name, compute: shared_cache.get_or_compute((key, name), compute)
+
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def selections():
+        return key_selections(filter_key())
+
+    # --- LIVE DATA ---
+    # Every session checks the store's version; outputs only recompute when
+    # a change touches rows the current filters can see.
+    @reactive.poll(lambda: store.version, max(RELOAD_SECONDS, 1))
+    def store_version():
+        return store.version
+
+    data_version = reactive.Value(store.version)
+
+    @reactive.Effect
+    @reactive.event(store_version, ignore_init=True)
+    def _():
+        if store.affects(data_version.get(), selections()):
+            data_version.set(store.version)
+
+    # --- FILTER FACETS ---
+    # Counts for all four filters from one pass over the cube cells; any data
+    # change refreshes them (new departments, sources... show up too)
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def facets():
+        store_version()
+        return cached("facets", lambda: backend.facets(selections()))
+
+    shown_facets = {}  # input id -> option labels last sent to the browser
+
+    @reactive.Effect
+    @keep_on_error("filter_facets")
+    @telemetry.timed("effect", "filter_facets")
+    def _():
+        counts = facets()
+        for col, input_id in FACET_INPUTS.items():
+            labels = {value: facet_label(value, n) for value, n in counts.get(col, {}).items()}
+            if labels != shown_facets.get(input_id):
+                shown_facets[input_id] = labels
+                with reactive.isolate():
+                    selected = list(input[input_id]())
+                ui.update_selectize(input_id, choices=labels, selected=selected)
+
+        sex = counts.get("Sex", {})
+        labels = {"All": facet_label("All", sum(sex.values())),
+                  **{value: facet_label(value, n) for value, n in sex.items()}}
+        if labels != shown_facets.get("sex_filter"):
+            shown_facets["sex_filter"] = labels
+            with reactive.isolate():
+                selected = input.sex_filter()
+            choices = {value: ui.span(label, class_="facet-empty") if label.endswith(" (0)") else label
+                       for value, label in labels.items()}
+            ui.update_radio_buttons("sex_filter", choices=choices, selected=selected)
+
+    # --- AGGREGATION (from the query backend, shared by all outputs) ---
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def summary():
+        data_version.get()
+        stats = cached("summary", lambda: backend.summarize(selections()))
+        if timeline.mark("first_render"):
+            timeline.log()
+        return stats
 
-    
     # --- KPI CALCULATIONS ---
     @render.text
+    @telemetry.timed("render")
     def kpi_headcount():
-        dff = filtered_df()
-        return "0" if dff.empty else f"{dff[dff['EmploymentStatus'] == 'Active'].shape[0]}"
+        return kpi_texts(summary())["kpi_headcount"]
 
     @render.text
+    @telemetry.timed("render")
     def kpi_attrition():
-        dff = filtered_df()
-        return "0%" if dff.empty else f"{dff['Termd'].mean():.1%}"
+        return kpi_texts(summary())["kpi_attrition"]
 
     @render.text
+    @telemetry.timed("render")
     def kpi_engagement():
-        dff = filtered_df()
-        return "0" if dff.empty else f"{dff['EngagementSurvey'].mean():.2f} / 5.0"
+        return kpi_texts(summary())["kpi_engagement"]
 
     @render.text
+    @telemetry.timed("render")
     def kpi_satisfaction():
-        dff = filtered_df()
-        return "0" if dff.empty else f"{dff['EmpSatisfaction'].mean():.2f} / 5.0"
+        return kpi_texts(summary())["kpi_satisfaction"]
 
     @render.text
+    @telemetry.timed("render")
     def kpi_performance():
-        dff = filtered_df()
-        if dff.empty or dff.shape[0] == 0:
-            return "0%"
-        high = dff[dff['PerformanceScore'].isin(['Exceeds', 'Fully Meets'])].shape[0]
-        return f"{high / dff.shape[0]:.1%}"
+        return kpi_texts(summary())["kpi_performance"]
 
     # --- VISUALIZATIONS ---
+    # Each chart is one persistent widget per session (see charts.py); the
+    # effects below only push new traces into it when the data changes.
+
+    # The widget script's URL as this browser sees the page (behind any
+    # proxy); None, and so inlined, if the session has no client data
+    widget_script = None
+    if WIDGET_SCRIPT == "shared":
+        with reactive.isolate():
+            try:
+                client = session.clientdata
+                port = client.url_port()
+                page = f"{client.url_protocol()}//{client.url_hostname()}{':' + port if port else ''}{client.url_pathname()}"
+                widget_script = urljoin(page, charts.BUNDLE_NAME)
+            except ValueError:
+                pass
+
+    # Heavy charts compute their (traces, layout) on the render pool as an
+    # extended task: the loop keeps serving while they run. A new request
+    # cancels the one in flight, and a result is only drawn if nothing newer
+    # was requested since, so an earlier filter never overwrites a later one.
+    def offloaded(name, chart):
+        requested = [0]
+
+        @reactive.extended_task
+        async def task(n, compute):
+            start = time.perf_counter()
+            if render_pool is None:
+                result = compute()
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(render_pool, compute)
+            telemetry.observe("task", name, time.perf_counter() - start)
+            return n, result
+
+        @reactive.Effect
+        @keep_on_error(name)
+        @telemetry.timed("effect", name)
+        def _():
+            n, (traces, layout) = task.result()
+            if n == requested[0]:
+                charts.patch(chart.widget, traces, layout=layout)
+
+        def request(compute):
+            requested[0] += 1
+            task.cancel()  # the next invocation runs as soon as it has stopped
+            task.invoke(requested[0], compute)
+
+        return request
 
     @render_widget
+    @telemetry.timed("render")
     def plot_attrition_dept():
-        dff = filtered_df()
-        if dff.empty: return
-        term_df = dff[dff['Termd'] == 1]
-        if term_df.empty: return
-        
-        counts = term_df['Department'].value_counts().reset_index()
-        counts.columns = ['Department', 'Count']
-        
-        fig = px.bar(
-            counts, x="Count", y="Department", orientation='h',
-            color="Count", color_continuous_scale=[theme_colors[0], theme_colors[1]]
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            showlegend=False, 
-            yaxis={'categoryorder':'total ascending'},
-            margin=dict(l=0, r=0, t=10, b=0) 
-        )
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_attrition_dept"])
+
+    @reactive.Effect
+    @keep_on_error("plot_attrition_dept")
+    @telemetry.timed("effect", "plot_attrition_dept")
+    def _():
+        traces, layout = summary_chart("plot_attrition_dept", summary())
+        charts.patch(plot_attrition_dept.widget, traces, layout=layout)
 
     @render_widget
+    @telemetry.timed("render")
     def plot_term_reasons():
-        dff = filtered_df()
-        if dff.empty: return
-        term_df = dff[dff['Termd'] == 1]
-        if term_df.empty: return
-        
-        counts = term_df['TermReason'].value_counts().head(10).reset_index()
-        counts.columns = ['Reason', 'Count']
-        
-        fig = px.bar(
-            counts, x="Count", y="Reason", orientation='h',
-            color="Count", color_continuous_scale=[theme_colors[2], theme_colors[0]]
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            showlegend=False, 
-            yaxis={'categoryorder':'total ascending'},
-            margin=dict(l=0, r=0, t=10, b=0)
-        )
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_term_reasons"])
+
+    @reactive.Effect
+    @keep_on_error("plot_term_reasons")
+    @telemetry.timed("effect", "plot_term_reasons")
+    def _():
+        traces, layout = summary_chart("plot_term_reasons", summary())
+        charts.patch(plot_term_reasons.widget, traces, layout=layout)
 
     @render_widget
+    @telemetry.timed("render")
     def plot_tenure():
-        dff = filtered_df()
-        if dff.empty: return
-        term_df = dff[dff['Termd'] == 1].copy()
-        if term_df.empty: return
-        
-        term_df['TenureDays'] = (term_df['DateofTermination'] - term_df['DateofHire']).dt.days
-        
-        term_df['YearsInt'] = (term_df['TenureDays'] / 365).astype(int)
-        tenure_counts = term_df['YearsInt'].value_counts().reset_index()
-        tenure_counts.columns = ['YearsInt', 'Count']
-        
-        # Sort numerically so the x-axis is 0, 1, 2, 3...
-        tenure_counts = tenure_counts.sort_values('YearsInt')
-
-        # Create readable labels
-        def make_label(y):
-            if y < 1: return "< 1 Year"
-            elif y == 1: return "1 Year"
-            else: return f"{y} Years"
-    
-        tenure_counts['Label'] = tenure_counts['YearsInt'].apply(make_label)
-        
-        fig = px.bar(
-            tenure_counts, x="Label", y="Count",
-            # Force Plotly to respect the numerical sort order
-            category_orders={"Label": tenure_counts['Label'].tolist()},
-            color_discrete_sequence=[theme_colors[1]]
-        )
-        
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            bargap=0.2, 
-            showlegend=False,
-            margin=dict(l=0, r=0, t=10, b=0)
-        )
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_tenure"])
+
+    @reactive.Effect
+    @keep_on_error("plot_tenure")
+    @telemetry.timed("effect", "plot_tenure")
+    def _():
+        traces, layout = summary_chart("plot_tenure", summary())
+        charts.patch(plot_tenure.widget, traces, layout=layout)
 
     @render_widget
+    @telemetry.timed("render")
     def plot_recruitment():
-        dff = filtered_df()
-        if dff.empty: return
-        
-        df_grp = dff.groupby(['RecruitmentSource', 'EmploymentStatus']).size().reset_index(name='Count')
-        
-        fig = px.bar(
-            df_grp, x="Count", y="RecruitmentSource", color="EmploymentStatus",
-            orientation='h',
-            color_discrete_sequence=theme_colors
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            yaxis={'categoryorder':'total ascending'},
-            margin=dict(l=0, r=0, t=10, b=0),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-        )
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_recruitment"])
+
+    draw_recruitment = offloaded("plot_recruitment", plot_recruitment)
+
+    @reactive.Effect
+    @keep_on_error("plot_recruitment")
+    def _():
+        stats = summary()
+        draw_recruitment(lambda: summary_chart("plot_recruitment", stats))
+
+    @render_widget
+    @telemetry.timed("render")
+    def plot_headcount_trend():
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_headcount_trend"])
+
+    @reactive.Effect
+    @keep_on_error("plot_headcount_trend")
+    @telemetry.timed("effect", "plot_headcount_trend")
+    def _():
+        traces, layout = summary_chart("plot_headcount_trend", summary())
+        charts.patch(plot_headcount_trend.widget, traces, layout=layout)
 
     @render_widget
+    @telemetry.timed("render")
     def plot_perf_dist():
-        dff = filtered_df()
-        if dff.empty: return
-        
-        counts = dff['PerformanceScore'].value_counts().reset_index()
-        counts.columns = ['Score', 'Count']
-        
-        fig = px.pie(
-            counts, values='Count', names='Score', hole=0.4,
-            color_discrete_sequence=theme_colors
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            margin=dict(l=0, r=0, t=20, b=0)
-        )
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_perf_dist"])
+
+    @reactive.Effect
+    @keep_on_error("plot_perf_dist")
+    @telemetry.timed("effect", "plot_perf_dist")
+    def _():
+        traces, layout = summary_chart("plot_perf_dist", summary())
+        charts.patch(plot_perf_dist.widget, traces, layout=layout)
 
     @render_widget
+    @telemetry.timed("render")
     def plot_prod_sat_matrix():
-        dff = filtered_df()
-        if dff.empty: return
-        
-        # NEW LOGIC: Boxplot of EngagementSurvey by Department
-        fig = px.box(
-            dff, 
-            x="Department", 
-            y="EngagementSurvey", 
-            color="Department", # Color by Department for visual distinction
-            points="outliers", # Only show outliers as points
-            hover_data=["Employee_Name", "ManagerName", "EmpSatisfaction"],
-            color_discrete_sequence=theme_colors
-        )
-        
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            margin=dict(l=0, r=0, t=10, b=0),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            xaxis_title=None, 
-            yaxis_title="Engagement Survey Score", # Added Y-axis title
-            showlegend=False # Legend hidden as color is by x-axis variable
-        )
-        # Rotate x-axis labels for better readability if Department names are long
-        fig.update_xaxes(tickangle=45) 
-        return fig
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_prod_sat_matrix"])
+
+    draw_engagement = offloaded("plot_prod_sat_matrix", plot_prod_sat_matrix)
+
+    @reactive.Effect
+    @keep_on_error("plot_prod_sat_matrix")
+    def _():
+        data_version.get()
+        key, sel = filter_key(), selections()
+        draw_engagement(lambda: (box_chart("plot_prod_sat_matrix", sel, cached_for(key)), None))
 
     @render_widget
+    @telemetry.timed("render")
     def plot_attendance_perf():
-        dff = filtered_df()
-        if dff.empty: return
-        
-        # NEW LOGIC: Boxplot of Absences by Department
-        fig = px.box(
-            dff, 
-            x="Department", 
-            y="Absences", 
-            color="Department", # Color by Department for visual distinction
-            points="outliers", 
-            hover_data=["Employee_Name", "ManagerName"],
-            color_discrete_sequence=theme_colors
-        )
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_attendance_perf"])
 
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            margin=dict(l=0, r=0, t=10, b=0),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
-            xaxis_title=None, 
-            yaxis_title="Number of Absences", # Added Y-axis title
-            showlegend=False
-        )
-        # Rotate x-axis labels for better readability
-        fig.update_xaxes(tickangle=45) 
-        return fig
+    draw_absences = offloaded("plot_attendance_perf", plot_attendance_perf)
+
+    @reactive.Effect
+    @keep_on_error("plot_attendance_perf")
+    def _():
+        data_version.get()
+        key, sel = filter_key(), selections()
+        draw_absences(lambda: (box_chart("plot_attendance_perf", sel, cached_for(key)), None))
+
+    # --- MANAGER LEADERBOARD ---
+    # Per-manager means come from the cube for any filter; search, sort and
+    # paging happen on that small table, and only the visible page is drawn.
+    manager_page = reactive.Value(0)
+
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def manager_board():
+        stats = summary()
+        board = None if stats is None else stats["manager_stats"]
+        if board is None:
+            return None
+        query = input.mgr_search().strip()
+        if query:
+            board = board[board["ManagerName"].str.contains(query, case=False, regex=False)]
+        key = input.mgr_sort()
+        if key == "ManagerName":
+            return board.sort_values("ManagerName", ignore_index=True)
+        if key != "PerfScoreNum":  # summary order is already by performance
+            board = board.sort_values([key, "ManagerName"], ascending=[False, True], ignore_index=True)
+        return board
+
+    @reactive.Calc
+    @telemetry.timed("calc")
+    def manager_page_rows():
+        board = manager_board()
+        if board is None or board.empty:
+            return board, 0
+        last_page = (len(board) - 1) // MANAGER_PAGE_SIZE
+        start = min(manager_page.get(), last_page) * MANAGER_PAGE_SIZE
+        return board.iloc[start:start + MANAGER_PAGE_SIZE], start
+
+    # Back to the first page whenever the list itself changes
+    @reactive.Effect
+    @reactive.event(filter_key, input.mgr_search, input.mgr_sort, ignore_init=True)
+    def _():
+        manager_page.set(0)
+
+    @reactive.Effect
+    @reactive.event(input.mgr_prev)
+    def _():
+        manager_page.set(max(manager_page.get() - 1, 0))
+
+    @reactive.Effect
+    @reactive.event(input.mgr_next)
+    def _():
+        board = manager_board()
+        last_page = 0 if board is None else max(len(board) - 1, 0) // MANAGER_PAGE_SIZE
+        manager_page.set(min(manager_page.get() + 1, last_page))
+
+    @render.text
+    @telemetry.timed("render")
+    def mgr_page_info():
+        board = manager_board()
+        page, start = manager_page_rows()
+        if board is None or board.empty:
+            return "No managers"
+        return f"{start + 1:,}\u2013{start + len(page):,} of {len(board):,}"
 
     @render_widget
+    @telemetry.timed("render")
     def plot_manager_effect():
-        dff = filtered_df()
-        if dff.empty: return
-        
-        mgr_df = dff.copy()
-        score_map = {'Exceeds': 4, 'Fully Meets': 3, 'Needs Improvement': 2, 'PIP': 1}
-        mgr_df['PerfScoreNum'] = mgr_df['PerformanceScore'].map(score_map)
-        
-        mgr_stats = mgr_df.groupby('ManagerName')[['PerfScoreNum', 'EmpSatisfaction']].mean().reset_index()
-        
-        # --- MODIFIED: SORT BY PERFORMANCE THEN SATISFACTION (Alternative 2) ---
-        mgr_stats = mgr_stats.sort_values(
-            # Sort first by PerformanceScore (primary) and then by EmpSatisfaction (tie-breaker)
-            ['PerfScoreNum', 'EmpSatisfaction'], 
-            # Use ascending=True for both, as Plotly's horizontal bar charts start at the bottom
-            ascending=[False, False] 
-        )
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_manager_effect"])
+
+    draw_managers = offloaded("plot_manager_effect", plot_manager_effect)
 
-        mgr_melted = mgr_stats.melt(id_vars='ManagerName', var_name='Metric', value_name='Score')
-        mgr_melted['Metric'] = mgr_melted['Metric'].replace({'PerfScoreNum': 'Avg Performance', 'EmpSatisfaction': 'Avg Satisfaction'})
+    @reactive.Effect
+    @keep_on_error("plot_manager_effect")
+    def _():
+        page, _ = manager_page_rows()
+        draw_managers(lambda: manager_chart(page))
 
-        # Get the new ordered list of managers
-        manager_order = mgr_stats['ManagerName'].tolist()
+    @render_widget
+    @telemetry.timed("render")
+    def plot_salary_dist():
+        return charts.figure_widget(widget_script, **CHART_LAYOUTS["plot_salary_dist"])
 
-        fig = px.bar(
-            mgr_melted, y="ManagerName", x="Score", color="Metric", 
-            barmode="group", orientation='h', height=600,
-            color_discrete_sequence=[theme_colors[1], theme_colors[2]],
-            # --- NEW: ENFORCE CUSTOM ORDERING ---
-            category_orders={"ManagerName": manager_order} 
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="gray",
-            margin=dict(l=0, r=0, t=10, b=0),
-            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="left", x=0)
-        )
-        return fig
+    @reactive.Effect
+    @keep_on_error("plot_salary_dist")
+    @telemetry.timed("effect", "plot_salary_dist")
+    def _():
+        traces, layout = summary_chart("plot_salary_dist", summary())
+        charts.patch(plot_salary_dist.widget, traces, layout=layout)
 
 static_dir = Path(__file__).parent / "assets"
-app = App(app_ui, server, static_assets=static_dir)
\ No newline at end of file
+app = App(app_ui, server, static_assets=static_dir)
+# The Plotly widget script the charts load (see charts.py)
+app.starlette_app.router.routes.insert(0, Route("/" + charts.BUNDLE_NAME, charts.bundle_endpoint))
+# Prometheus scrape target, served next to the app
+app.starlette_app.router.routes.insert(0, Route("/metrics", telemetry.endpoint))
+# Startup timeline (see startup.py): text at /startup, gauges at /metrics
+app.starlette_app.router.routes.insert(0, Route("/startup", timeline.endpoint))
+timeline.register(telemetry, ["imports", "ui", "app", "data", "first_session", "first_render"])
+timeline.mark("app")
\ No newline at end of file
@@ -0,0 +1,227 @@
+# Static snapshots of the dashboard for many filter combinations.
+#
+# Every combination gets the KPIs and every chart exactly as a session draws
+# them (main.kpi_texts, summary_chart, box_chart and manager_chart), written
+# as a standalone HTML page and/or a JSON file with the Plotly figures, plus
+# an index.html linking them all. The manager chart shows the first page of
+# the leaderboard, as the app does before any paging.
+#
+# The dataset is loaded once, in this process. Worker processes are forked
+# from it afterwards, so they share the loaded frame, filter index and cube
+# copy-on-write instead of each loading their own (gc.freeze() keeps the
+# collector from touching, and so copying, those pages).
+#
+#   python prerender.py snapshots/                          # Department x RecruitmentSource
+#   python prerender.py snapshots/ --dims Department Sex --totals
+#   python prerender.py snapshots/ --combos combos.json --workers 8 --format json
+#
+# combos.json is a list of selections such as {"Department": ["Sales"], "Sex": ["F"]};
+# filter columns left out are not filtered. Pages load plotly.min.js from the
+# output directory (written once), so a snapshot folder also works offline.
+
+import argparse
+import gc
+import hashlib
+import html
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("HR_RELOAD_SECONDS", "0")
+os.environ.setdefault("HR_TELEMETRY", "0")
+
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+import charts
+import main
+from backends import PandasBackend, from_environment
+
+# With HR_FAST_START=1 the dataset is still loading in the background
+main.data_ready.wait()
+
+DEFAULT_DIMS = ["Department", "RecruitmentSource"]
+
+PAGE_STYLE = """
+    body { font-family: 'Open Sans', sans-serif; margin: 20px 30px; color: #191C24; }
+    .filters { color: gray; margin-bottom: 20px; }
+    .kpis { display: flex; gap: 15px; margin-bottom: 25px; }
+    .kpi { flex: 1; padding: 15px; border-radius: 6px; color: white; background: #AF1763; }
+    .kpi .value { font-size: 1.6rem; font-weight: 700; }
+    .charts { display: grid; grid-template-columns: 1fr 1fr; gap: 20px; }
+    .card { padding: 10px; box-shadow: 0 4px 6px rgba(0,0,0,0.05); border: 1px solid #eee; }
+    table { border-collapse: collapse; }
+    td, th { padding: 4px 10px; border-bottom: 1px solid #eee; text-align: left; }
+"""
+
+
+def combinations(dims, totals=False):
+    # Cross product of every value of dims (plus "all" per dim with totals)
+    levels = []
+    for dim in dims:
+        values = [[value] for value in main.get_choices(dim)]
+        levels.append(([[]] if totals else []) + values)
+    return [dict(zip(dims, combo)) for combo in itertools.product(*levels)]
+
+
+def full_selections(selections):
+    # Every filter column present, as key_selections() gives them
+    return {col: list(selections.get(col, [])) for col in main.FILTER_COLUMNS}
+
+
+def slug(selections):
+    # Readable part plus a short hash of the exact selections: values that
+    # differ only in punctuation or case still get their own file
+    parts = ["+".join(values) if values else "all" for values in selections.values()]
+    readable = re.sub(r"[^A-Za-z0-9+_]+", "-", "__".join(parts)).strip("-").lower() or "all"
+    digest = hashlib.sha1(json.dumps(selections, sort_keys=True).encode()).hexdigest()[:8]
+    return f"{readable}-{digest}"
+
+
+def describe(selections):
+    return " · ".join(f"{col}: {', '.join(values) or 'All'}" for col, values in selections.items())
+
+
+# --- Rendering (runs in the workers) ---
+
+def snapshot(selections):
+    # KPI texts and Plotly figures for one combination
+    stats = main.backend.summarize(selections)
+    figures = {}
+    for name in main.SUMMARY_CHARTS:
+        traces, layout = main.summary_chart(name, stats)
+        figures[name] = charts.figure(traces, layout, **main.CHART_LAYOUTS[name])
+    for name in main.BOX_CHARTS:
+        figures[name] = charts.figure(main.box_chart(name, selections), **main.CHART_LAYOUTS[name])
+    board = None if stats is None else stats["manager_stats"]
+    traces, layout = main.manager_chart(None if board is None else board.head(main.MANAGER_PAGE_SIZE))
+    figures["plot_manager_effect"] = charts.figure(traces, layout, **main.CHART_LAYOUTS["plot_manager_effect"])
+    # In dashboard order
+    return stats, main.kpi_texts(stats), {name: figures[name] for name in main.CHART_TITLES}
+
+
+def page_html(selections, kpis, figures):
+    cards = "\n".join(
+        f'<div class="card"><h3>{html.escape(main.CHART_TITLES[name])}</h3>'
+        f'{pio.to_html(fig, full_html=False, include_plotlyjs=False, div_id=name)}</div>'
+        for name, fig in figures.items()
+    )
+    boxes = "\n".join(
+        f'<div class="kpi"><div>{html.escape(main.KPI_LABELS[name])}</div>'
+        f'<div class="value">{html.escape(text)}</div></div>'
+        for name, text in kpis.items()
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>HR Dashboard - {html.escape(describe(selections))}</title>
+<script src="plotly.min.js"></script><style>{PAGE_STYLE}</style></head>
+<body>
+<h2>HR Employee Productivity &amp; Retention Dashboard</h2>
+<p class="filters">{html.escape(describe(selections))}</p>
+<div class="kpis">{boxes}</div>
+<div class="charts">{cards}</div>
+</body></html>
+"""
+
+
+def render(task):
+    out_dir, formats, skip_empty, selections = task
+    selections = full_selections(selections)
+    stats, kpis, figures = snapshot(selections)
+    if stats is None and skip_empty:
+        return None
+    name = slug(selections)
+    if "html" in formats:
+        (out_dir / f"{name}.html").write_text(page_html(selections, kpis, figures), encoding="utf-8")
+    if "json" in formats:
+        figure_json = ", ".join(f"{json.dumps(n)}: {pio.to_json(fig)}" for n, fig in figures.items())
+        (out_dir / f"{name}.json").write_text(
+            f'{{"selections": {json.dumps(selections)}, "kpis": {json.dumps(kpis)}, "figures": {{{figure_json}}}}}',
+            encoding="utf-8",
+        )
+    return name, selections, kpis
+
+
+def _init_worker():
+    # A DuckDB connection can't cross a fork: each worker opens its own
+    if not isinstance(main.backend, PandasBackend):
+        main.backend = from_environment(main.store, main.CUBE_CHECK)
+
+
+# --- Driver ---
+
+def prerender(out_dir, combos, formats=("html", "json"), workers=None, skip_empty=False):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if "html" in formats:
+        (out_dir / "plotly.min.js").write_text(get_plotlyjs(), encoding="utf-8")
+
+    seen = set()
+    for selections in combos:
+        name = slug(full_selections(selections))
+        if name in seen:
+            raise ValueError(f"two combinations would both be written as {name}")
+        seen.add(name)
+
+    tasks = [(out_dir, formats, skip_empty, selections) for selections in combos]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        # Everything loaded so far becomes shared, read-only pages
+        gc.freeze()
+        with multiprocessing.get_context("fork").Pool(workers, initializer=_init_worker) as pool:
+            chunksize = max(1, len(tasks) // (workers * 8))
+            results = list(pool.imap(render, tasks, chunksize=chunksize))
+    else:
+        results = [render(task) for task in tasks]
+    results = [r for r in results if r is not None]
+
+    if "html" in formats:
+        write_index(out_dir, results)
+    return results
+
+
+def write_index(out_dir, results):
+    columns = main.FILTER_COLUMNS
+    head = "".join(f"<th>{html.escape(c)}</th>" for c in columns + list(main.KPI_LABELS.values()))
+    rows = []
+    for name, selections, kpis in results:
+        cells = [", ".join(selections[c]) or "All" for c in columns]
+        link = f'<a href="{name}.html">{html.escape(cells[0])}</a>'
+        rows.append("<tr><td>" + "</td><td>".join([link] + [html.escape(c) for c in cells[1:]]
+                                                  + [html.escape(kpis[k]) for k in main.KPI_LABELS]) + "</td></tr>")
+    (out_dir / "index.html").write_text(f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>HR Dashboard snapshots</title><style>{PAGE_STYLE}</style></head>
+<body><h2>HR Dashboard snapshots ({len(results):,})</h2>
+<table><thead><tr>{head}</tr></thead><tbody>
+{chr(10).join(rows)}
+</tbody></table></body></html>
+""", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render static dashboard snapshots for many filter combinations")
+    parser.add_argument("output", help="directory for the snapshots")
+    parser.add_argument("--dims", nargs="+", default=DEFAULT_DIMS, choices=main.FILTER_COLUMNS,
+                        help="filter columns whose values are crossed")
+    parser.add_argument("--totals", action="store_true", help="also render 'All' for each of --dims")
+    parser.add_argument("--combos", help="JSON file with a list of selections (instead of --dims)")
+    parser.add_argument("--format", nargs="+", default=["html", "json"], choices=["html", "json"])
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--skip-empty", action="store_true", help="leave out combinations matching nobody")
+    args = parser.parse_args()
+
+    if args.combos:
+        with open(args.combos) as f:
+            combos = json.load(f)
+    else:
+        combos = combinations(args.dims, args.totals)
+
+    start = time.perf_counter()
+    results = prerender(args.output, combos, args.format, args.workers, args.skip_empty)
+    elapsed = time.perf_counter() - start
+    print(f"{args.output}: {len(results):,} snapshots of {len(combos):,} combinations in {elapsed:.1f}s "
+          f"({len(combos) / elapsed:,.1f}/s)", file=sys.stderr)
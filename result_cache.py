@@ -0,0 +1,121 @@
+# Process-wide LRU cache for filter results and aggregates.
+#
+# Every session of the app lives in the same Python process, and most users
+# look at the same few filter combinations. Entries are keyed by the
+# normalized filter selection (plus the name of the value being cached), so
+# the first session to ask for a combination pays for it and every other
+# session reuses the result.
+
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+def make_filter_key(dept, recruit, marital, sex):
+    # Selection order in a selectize input doesn't change the result
+    return (
+        tuple(sorted(dept or ())),
+        tuple(sorted(recruit or ())),
+        tuple(sorted(marital or ())),
+        sex,
+    )
+
+
+def estimate_nbytes(value):
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(k) + estimate_nbytes(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    def __init__(self, max_entries=512, max_bytes=128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Bumped by invalidate(); values computed across a bump are not kept
+        self._epoch = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            epoch = self._epoch
+
+        # Compute outside the lock; two sessions racing on the same key
+        # just both compute it once.
+        value = compute()
+        self.put(key, value, epoch)
+        return value
+
+    def put(self, key, value, epoch=None):
+        size = estimate_nbytes(value)
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            # Values bigger than the whole budget are returned but not kept
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while len(self._entries) > self.max_entries or self.nbytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, predicate):
+        # Drop every entry whose key matches predicate(key)
+        with self._lock:
+            self._epoch += 1
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self.nbytes -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.nbytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,158 @@
+# Memory-mapped copy of the preprocessed dataset, shared by app workers.
+#
+# With HR_SHARED_STORE=/dev/shm/hr-dashboard (any directory works, tmpfs is
+# fastest) the first worker to start becomes the loader: it runs the normal
+# load_dataset() pipeline and writes every column to a .npy file there. Every
+# worker, the loader included, then maps those files read-only. Numeric,
+# date and categorical-code columns become zero-copy views of the mapping,
+# and string columns become Arrow arrays over mapped buffers. The OS keeps
+# one copy of the pages no matter how many workers there are.
+#
+# The store is rebuilt when the source CSV's mtime or size (or the loader's
+# SIDECAR_VERSION) changes. A new build goes into a fresh generation of
+# files, so workers still mapping the old one are unaffected.
+#
+#   python shared_store.py    # build the store ahead of starting the workers
+
+import json
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_loader import DATA_PATH, SIDECAR_VERSION, load_dataset
+
+try:
+    import fcntl
+except ImportError:  # Windows: no locking, each worker may rebuild
+    fcntl = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+STORE_DIR = os.environ.get("HR_SHARED_STORE")
+MANIFEST = "manifest.json"
+
+
+def load_shared(store_dir, source=DATA_PATH, build=load_dataset):
+    store_dir = Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+    stat = Path(source).stat()
+    fingerprint = {"source": str(Path(source).resolve()), "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                   "version": SIDECAR_VERSION}
+
+    with open(store_dir / ".lock", "a+") as lock:
+        _lock(lock, shared=True)
+        manifest = _read_manifest(store_dir)
+        if manifest is None or manifest["fingerprint"] != fingerprint:
+            # Upgrade to an exclusive lock; another worker may have built it meanwhile
+            _lock(lock, shared=False)
+            manifest = _read_manifest(store_dir)
+            if manifest is None or manifest["fingerprint"] != fingerprint:
+                manifest = write_store(store_dir, build(source), fingerprint)
+        return map_store(store_dir, manifest)
+
+
+def _lock(lock, shared):
+    if fcntl is not None:
+        fcntl.flock(lock, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+
+def _read_manifest(store_dir):
+    try:
+        return json.loads((store_dir / MANIFEST).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+# --- WRITING (loader process) ---
+
+def write_store(store_dir, df, fingerprint):
+    generation = uuid.uuid4().hex[:12]
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        entry = {"name": col, "file": f"{generation}-{len(columns)}"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            entry["kind"] = "category"
+            entry["categories"] = series.cat.categories.tolist()
+            np.save(store_dir / f"{entry['file']}.npy", np.asarray(series.array.codes))
+        elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+            entry["kind"] = "array"
+            np.save(store_dir / f"{entry['file']}.npy", series.to_numpy())
+        else:
+            entry["kind"] = "string"
+            _save_strings(store_dir / entry["file"], series)
+        columns.append(entry)
+
+    manifest = {"fingerprint": fingerprint, "generation": generation, "rows": len(df), "columns": columns}
+    tmp = store_dir / f"{MANIFEST}.{generation}"
+    tmp.write_text(json.dumps(manifest))
+    os.replace(tmp, store_dir / MANIFEST)
+
+    # Workers mapping an older generation keep their pages until they exit
+    for old in store_dir.glob("*.npy"):
+        if not old.name.startswith(generation):
+            old.unlink(missing_ok=True)
+    return manifest
+
+
+def _save_strings(prefix, series):
+    # Arrow large_string layout: int64 offsets + one UTF-8 buffer + validity bits
+    valid = series.notna().to_numpy()
+    encoded = [s.encode("utf-8") if ok else b"" for s, ok in zip(series.tolist(), valid)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    np.save(f"{prefix}-offsets.npy", offsets)
+    np.save(f"{prefix}-data.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(f"{prefix}-valid.npy", np.packbits(valid, bitorder="little"))
+
+
+# --- MAPPING (every worker) ---
+
+def _map(path):
+    # Plain ndarray view of the read-only mapping (np.memmap leaks into results otherwise)
+    return np.load(path, mmap_mode="r").view(np.ndarray)
+
+
+def map_store(store_dir, manifest):
+    columns = {}
+    for entry in manifest["columns"]:
+        path = store_dir / entry["file"]
+        if entry["kind"] == "category":
+            values = pd.Categorical.from_codes(_map(f"{path}.npy"), categories=entry["categories"], validate=False)
+        elif entry["kind"] == "array":
+            values = _map(f"{path}.npy")
+        else:
+            values = _map_strings(path, manifest["rows"])
+        columns[entry["name"]] = pd.Series(values, copy=False)
+    return pd.DataFrame(columns, copy=False)
+
+
+def _map_strings(prefix, n_rows):
+    offsets = _map(f"{prefix}-offsets.npy")
+    data = _map(f"{prefix}-data.npy")
+    valid = _map(f"{prefix}-valid.npy")
+    if pa is None:
+        # Without pyarrow the strings have to be decoded into this process
+        raw = data.tobytes()
+        bits = np.unpackbits(valid, count=n_rows, bitorder="little").astype(bool)
+        return np.array([raw[offsets[i]:offsets[i + 1]].decode("utf-8") if bits[i] else None
+                         for i in range(n_rows)], dtype=object)
+    array = pa.LargeStringArray.from_buffers(
+        n_rows, pa.py_buffer(offsets), pa.py_buffer(data), pa.py_buffer(valid)
+    )
+    return pd.array(array, dtype=pd.StringDtype("pyarrow"))
+
+
+if __name__ == "__main__":
+    if not STORE_DIR:
+        raise SystemExit("Set HR_SHARED_STORE to the directory to build the store in.")
+    df = load_shared(STORE_DIR)
+    manifest = _read_manifest(Path(STORE_DIR))
+    size = sum(p.stat().st_size for p in Path(STORE_DIR).glob(f"{manifest['generation']}-*.npy"))
+    print(f"{STORE_DIR}: {len(df)} rows, {len(df.columns)} columns, {size / 1024 / 1024:.1f} MiB mapped")
@@ -0,0 +1,133 @@
+# Startup timeline of a dashboard worker.
+#
+# main.py marks each phase of a cold start as it finishes: Python up (this
+# module imported), imports done, UI built, app ready to serve, dataset
+# loaded (before "ui" in an eager start, in the background with
+# HR_FAST_START=1), first session and first render with data. Times are
+# seconds since the process started (read from /proc where available,
+# otherwise since this module was imported), so they include the
+# interpreter's own start-up too. The timeline is logged once the first
+# render with data is done, and served as text at /startup and as gauges at
+# /metrics.
+#
+# Run this file to measure a cold start from outside: it starts a fresh
+# worker, times how long the page takes to answer and prints the worker's
+# own breakdown.
+#
+#   python startup.py                 # HR_FAST_START=1
+#   python startup.py --slow          # eager start, for comparison
+#   python startup.py --runs 5 --port 8765
+
+import logging
+import os
+import threading
+import time
+
+from starlette.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+
+def _process_age():
+    # Seconds since the process started, from /proc (Linux); None elsewhere
+    try:
+        with open("/proc/self/stat") as f:
+            # Field 22 (after the parenthesised command name): start time in ticks since boot
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Timeline:
+    def __init__(self):
+        # Monotonic clock, shifted so that 0 is the process start
+        self._origin = time.perf_counter() - (_process_age() or 0.0)
+        self.phases = {}  # phase -> seconds since start, in order reached
+        self._lock = threading.Lock()
+        self.mark("python")
+
+    def mark(self, phase):
+        # Only the first time a phase is reached counts
+        with self._lock:
+            if phase in self.phases:
+                return False
+            self.phases[phase] = time.perf_counter() - self._origin
+            return True
+
+    def report(self):
+        lines, previous = [], 0.0
+        for phase, seconds in self.phases.items():
+            lines.append(f"{phase:<16}{seconds:>9.3f}s  (+{seconds - previous:.3f}s)")
+            previous = seconds
+        return "\n".join(lines)
+
+    def log(self):
+        logger.info("Startup timeline (seconds since process start):\n%s", self.report())
+
+    def register(self, telemetry, phases):
+        # One gauge per phase; NaN until the phase is reached
+        for phase in phases:
+            telemetry.gauge(
+                f"hr_startup_{phase}_seconds", f"Seconds from process start to '{phase}'",
+                lambda phase=phase: self.phases.get(phase, float("nan")),
+            )
+
+    async def endpoint(self, request):
+        return PlainTextResponse(self.report() + "\n")
+
+
+# --- Measuring a cold start from outside ---
+
+def measure(port, fast=True, timeout=60):
+    # Start a worker, wait for the page to answer, return (seconds, /startup report)
+    import subprocess
+    import sys
+    import urllib.error
+    import urllib.request
+
+    env = {**os.environ, "HR_FAST_START": "1" if fast else "0"}
+    url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "shiny", "run", "--port", str(port), "main.py"],
+        cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(url + "/", timeout=timeout) as response:
+                    response.read()
+                break
+            except (urllib.error.URLError, ConnectionError):
+                if worker.poll() is not None:
+                    raise RuntimeError(f"worker exited with code {worker.returncode}")
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError(f"no page within {timeout}s")
+                time.sleep(0.01)
+        first_page = time.perf_counter() - start
+        with urllib.request.urlopen(url + "/startup", timeout=timeout) as response:
+            return first_page, response.read().decode()
+    finally:
+        worker.terminate()
+        worker.wait()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time a cold start of the dashboard")
+    parser.add_argument("--slow", action="store_true", help="eager start (HR_FAST_START=0)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    times = []
+    for run in range(args.runs):
+        seconds, report = measure(args.port, fast=not args.slow)
+        times.append(seconds)
+        print(f"run {run + 1}: first page after {seconds:.3f}s (from launch)\n{report}")
+    print(f"median: {sorted(times)[len(times) // 2]:.3f}s")
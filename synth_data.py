@@ -0,0 +1,266 @@
+# Synthetic HR data at any size, learned from HRDataset_v14.csv.
+#
+# HRModel.fit() reads the real export and keeps its distributions:
+#   - department and manager as one joint distribution (managers stay in
+#     their departments),
+#   - recruitment source given department, performance score given manager,
+#     satisfaction given performance, and employment status + termination
+#     reason given recruitment source (all smoothed, so rare combinations
+#     still turn up at large sizes),
+#   - sex and marital status jointly, absences on their own,
+#   - engagement per performance score, salary per department, hire dates
+#     and time to termination as smoothed resamples of the real values.
+# sample() then draws rows with the dashboard's columns (USE_COLUMNS) and
+# dtypes, fully vectorized. Chunk i is drawn from its own seeded generator, so
+# the output is reproducible and never more than one chunk is in memory.
+#
+#   python synth_data.py 1000000 hr_1m.csv
+#   python synth_data.py 300000000 hr_300m.parquet --seed 7 --chunk-rows 2000000
+#
+# Parquet output needs pyarrow; with it, CSV is written by pyarrow too (much
+# faster than DataFrame.to_csv).
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+from data_loader import CATEGORY_COLUMNS, DATA_PATH, DATE_COLUMNS, USE_COLUMNS, compact_frame, concat_compact, read_csv
+
+CHUNK_ROWS = 1_000_000
+
+# Pseudo-counts added to every cell of a conditional table, as a share of the
+# marginal: keeps the learned shape but lets unseen combinations happen
+SMOOTHING = 0.5
+
+# Jitter applied when resampling continuous values
+ENGAGEMENT_NOISE = 0.15
+SALARY_NOISE = 0.03  # relative
+HIRE_JITTER_DAYS = 90
+TENURE_JITTER_DAYS = 30
+
+
+class Categorical:
+    # Distribution over labels, optionally conditional on another column's codes
+    def __init__(self, labels, probs):
+        self.labels = np.asarray(labels, dtype=object)
+        self.probs = np.atleast_2d(probs)
+        # Row r's cumulative probabilities shifted by r: one increasing array,
+        # so every row can be sampled with a single searchsorted
+        cdf = np.cumsum(self.probs, axis=1)
+        cdf[:, -1] = 1.0
+        self._flat = (cdf + np.arange(len(cdf))[:, None]).ravel()
+
+    @classmethod
+    def fit(cls, values, given=None, given_labels=None):
+        labels, codes = _codes(values)
+        marginal = np.bincount(codes, minlength=len(labels)) / len(codes)
+        if given is None:
+            return cls(labels, marginal)
+        counts = np.zeros((len(given_labels), len(labels)))
+        np.add.at(counts, (given, codes), 1)
+        counts += SMOOTHING * marginal
+        return cls(labels, counts / counts.sum(axis=1, keepdims=True))
+
+    def sample_codes(self, rng, n, given=None):
+        row = np.zeros(n, dtype=np.intp) if given is None else given
+        k = self.probs.shape[1]
+        return np.searchsorted(self._flat, row + rng.random(n), side="right") - row * k
+
+    def sample(self, rng, n, given=None):
+        return self.labels[self.sample_codes(rng, n, given)]
+
+
+class Resample:
+    # Smoothed bootstrap of numeric values, optionally per group
+    def __init__(self, values, groups=None, n_groups=1):
+        values = np.asarray(values, dtype=float)
+        groups = np.zeros(len(values), dtype=np.intp) if groups is None else groups
+        order = np.argsort(groups, kind="stable")
+        self.values = values[order]
+        self.counts = np.bincount(groups, minlength=n_groups)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+        # Groups that never occur fall back to every value
+        empty = self.counts == 0
+        self.starts[empty], self.counts[empty] = 0, len(values)
+
+    def sample(self, rng, n, groups=None, noise=0.0):
+        g = np.zeros(n, dtype=np.intp) if groups is None else groups
+        idx = self.starts[g] + (rng.random(n) * self.counts[g]).astype(np.intp)
+        out = self.values[idx]
+        if noise:
+            out = out + rng.normal(0.0, noise, n)
+        return out
+
+
+class HRModel:
+    def __init__(self, df):
+        codes = {col: _codes(df[col]) for col in CATEGORY_COLUMNS}
+        self.categories = {col: labels for col, (labels, _) in codes.items()}
+
+        # Two columns drawn together: one label per combination, kept as the
+        # pair of per-column codes it stands for
+        def joint(a, b, given=None, given_labels=None):
+            (_, ca), (_, cb) = codes[a], codes[b]
+            nb = len(self.categories[b])
+            dist = Categorical.fit(ca * nb + cb, given, given_labels)
+            pair = dist.labels.astype(np.intp)
+            return dist, pair // nb, pair % nb
+
+        self.org, self.org_dept, self.org_manager = joint("Department", "ManagerName")
+        self.source = Categorical.fit(codes["RecruitmentSource"][1], codes["Department"][1], self.categories["Department"])
+        self.perf = Categorical.fit(codes["PerformanceScore"][1], codes["ManagerName"][1], self.categories["ManagerName"])
+        perf_codes = codes["PerformanceScore"][1]
+        n_perf = len(self.categories["PerformanceScore"])
+        self.satisfaction = Categorical.fit(df["EmpSatisfaction"], perf_codes, self.categories["PerformanceScore"])
+        self.engagement = Resample(df["EngagementSurvey"], perf_codes, n_perf)
+        self.engagement_range = (float(df["EngagementSurvey"].min()), float(df["EngagementSurvey"].max()))
+
+        self.salary = Resample(df["Salary"], codes["Department"][1], len(self.categories["Department"]))
+
+        self.person, self.person_sex, self.person_marital = joint("Sex", "MaritalDesc")
+        self.absences = Categorical.fit(df["Absences"])
+        self.status, self.status_code, self.reason_code = joint(
+            "EmploymentStatus", "TermReason", codes["RecruitmentSource"][1], self.categories["RecruitmentSource"]
+        )
+        self.still_employed = self.categories["EmploymentStatus"] == "Active"
+
+        self.hire = Resample(df["DateofHire"].to_numpy().astype("datetime64[D]").astype(np.int64))
+        self.hire_range = (self.hire.values.min(), self.hire.values.max())
+        left = df["DateofTermination"].notna()
+        tenure = (df.loc[left, "DateofTermination"] - df.loc[left, "DateofHire"]).dt.days
+        self.tenure = Resample(tenure.clip(lower=1))
+
+        # Every "Last, First" combination of the real names, as one string array
+        names = df["Employee_Name"].astype(object).str.split(",", n=1)
+        last = np.unique([n[0].strip() for n in names])
+        first = np.unique([n[1].strip() if len(n) > 1 else "" for n in names])
+        self.names = pd.array([f"{l}, {f}" for l in last for f in first], dtype="str")
+
+    @classmethod
+    def fit(cls, path=DATA_PATH):
+        return cls(read_csv(path))
+
+    def sample(self, n, rng):
+        # Everything is drawn as integer codes; labels only appear in the
+        # categoricals built at the end
+        org = self.org.sample_codes(rng, n)
+        dept, manager = self.org_dept[org], self.org_manager[org]
+        source = self.source.sample_codes(rng, n, dept)
+        perf = self.perf.sample_codes(rng, n, manager)
+        person = self.person.sample_codes(rng, n)
+        status = self.status.sample_codes(rng, n, source)
+        status_code = self.status_code[status]
+        termd = ~self.still_employed[status_code]
+
+        hire = np.clip(self.hire.sample(rng, n) + rng.integers(-HIRE_JITTER_DAYS, HIRE_JITTER_DAYS + 1, n),
+                       *self.hire_range).astype(np.int64)
+        tenure = self.tenure.sample(rng, n) + rng.integers(-TENURE_JITTER_DAYS, TENURE_JITTER_DAYS + 1, n)
+        term = np.where(termd, hire + np.maximum(1, tenure).astype(np.int64), np.iinfo(np.int64).min)
+        engagement = np.clip(self.engagement.sample(rng, n, perf, ENGAGEMENT_NOISE), *self.engagement_range)
+        salary = self.salary.sample(rng, n, dept) * rng.normal(1.0, SALARY_NOISE, n)
+
+        category_codes = {
+            "Sex": self.person_sex[person],
+            "MaritalDesc": self.person_marital[person],
+            "TermReason": self.reason_code[status],
+            "EmploymentStatus": status_code,
+            "Department": dept,
+            "ManagerName": manager,
+            "RecruitmentSource": source,
+            "PerformanceScore": perf,
+        }
+        columns = {
+            "Employee_Name": self.names.take(rng.integers(0, len(self.names), n)),
+            "Termd": termd.astype(np.int64),
+            "EngagementSurvey": np.round(engagement, 2),
+            "EmpSatisfaction": self.satisfaction.sample(rng, n, perf).astype(np.int64),
+            "Absences": self.absences.sample(rng, n).astype(np.int64),
+            "Salary": np.round(salary).astype(np.int64),
+            "DateofHire": hire.astype("datetime64[D]").astype("datetime64[us]"),
+            "DateofTermination": term.view("datetime64[D]").astype("datetime64[us]"),
+        }
+        # Fixed category sets, so every chunk has the same dtypes/schema
+        for col, values in category_codes.items():
+            columns[col] = pd.Categorical.from_codes(values, categories=self.categories[col])
+        return pd.DataFrame(columns)[USE_COLUMNS]
+
+    def chunks(self, n_rows, seed=0, chunk_rows=CHUNK_ROWS):
+        for i, start in enumerate(range(0, n_rows, chunk_rows)):
+            yield self.sample(min(chunk_rows, n_rows - start), np.random.default_rng([seed, i]))
+
+
+def _codes(values):
+    labels, codes = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+    return labels, codes
+
+
+# --- Output ---
+
+def synthesize(n_rows, seed=0, model=None, chunk_rows=CHUNK_ROWS):
+    # In-memory frame, compacted like load_dataset() output
+    model = model or HRModel.fit()
+    return concat_compact([compact_frame(chunk) for chunk in model.chunks(n_rows, seed, chunk_rows)])
+
+
+def write(path, n_rows, seed=0, model=None, chunk_rows=CHUNK_ROWS):
+    # One chunk at a time into <path>.tmp, renamed when complete
+    path = Path(path)
+    model = model or HRModel.fit()
+    parquet = path.suffix == ".parquet"
+    if parquet and not HAS_ARROW:
+        raise RuntimeError("Parquet output needs pyarrow")
+    tmp = path.with_name(path.name + ".tmp")
+    writer = None
+    try:
+        for i, chunk in enumerate(model.chunks(n_rows, seed, chunk_rows)):
+            if not parquet:
+                chunk = _csv_dates(chunk)
+            if not HAS_ARROW:
+                chunk.to_csv(tmp, mode="w" if i == 0 else "a", header=i == 0, index=False, lineterminator="\n")
+                continue
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = (pq.ParquetWriter(tmp, table.schema) if parquet
+                          else pa_csv.CSVWriter(tmp, table.schema, write_options=pa_csv.WriteOptions(quoting_style="needed")))
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp, path)
+
+
+def _csv_dates(chunk):
+    # Format each distinct day once (a few thousand) instead of every row
+    for col in DATE_COLUMNS:
+        days, codes = np.unique(chunk[col].to_numpy(), return_inverse=True)
+        chunk[col] = pd.DatetimeIndex(days).strftime("%m/%d/%Y").to_numpy(dtype=object)[codes]
+    return chunk
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write synthetic HR rows learned from the real export")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output", help="a .csv or .parquet file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--source", default=DATA_PATH, help="CSV to learn from")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write(args.output, args.rows, args.seed, HRModel.fit(args.source), args.chunk_rows)
+    elapsed = time.perf_counter() - start
+    size = Path(args.output).stat().st_size
+    print(f"{args.output}: {args.rows:,} rows, {size / 2**20:.1f} MiB in {elapsed:.1f}s "
+          f"({args.rows / elapsed:,.0f} rows/s)")
@@ -0,0 +1,234 @@
+# Render telemetry for the dashboard, served at /metrics.
+#
+# Telemetry.timed() wraps the reactive calcs, render functions and chart
+# effects in server(). Every run records
+#
+#   - its execution time (a histogram per output),
+#   - the invalidation that will trigger its next run,
+#   - for text outputs the size of the rendered value, and for chart
+#     widgets the size of the update messages sent to the browser,
+#
+# plus the number of active sessions; chart work done on the render pool is
+# recorded through observe() as kind "task". Times are inclusive: the first
+# output to read an invalidated calc also pays for recomputing it. /metrics exposes all
+# of it in the Prometheus text format, together with any gauges registered
+# with gauge() (cache and data statistics in main.py).
+#
+# Runs slower than the slow-render threshold are logged with their session
+# id, and the last few per session are kept for get_slow_renders().
+
+import functools
+import logging
+import re
+import threading
+import time
+from collections import deque
+
+from shiny import reactive
+from shiny.session import get_current_session
+from shiny.types import SilentException
+from starlette.responses import PlainTextResponse
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets for execution time, in seconds
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Slow renders kept per session
+SLOW_LOG_SIZE = 50
+
+# Which widget a shinywidgets update message is for
+COMM_ID = re.compile(r'"comm_id":\s*"([^"]+)"')
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+class SessionStats:
+    def __init__(self, session_id):
+        self.id = session_id
+        self.widgets = {}  # widget model_id -> output name
+        self.slow = deque(maxlen=SLOW_LOG_SIZE)
+
+
+class Telemetry:
+    def __init__(self, enabled=True, slow_ms=0):
+        self.enabled = enabled
+        self.slow_seconds = slow_ms / 1000
+        # (name, kind) -> values
+        self.runs = {}
+        self.invalidations = {}
+        self.errors = {}
+        self.payload_bytes = {}
+        self.seconds = {}
+        self.sessions = {}
+        self.sessions_total = 0
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    # --- Recording ---
+
+    def timed(self, kind, name=None):
+        # Decorator for a calc ("calc"), render function ("render") or chart
+        # effect ("effect"); name defaults to the function's name
+        def decorator(fn):
+            if not self.enabled:
+                return fn
+            label = (name or fn.__name__, kind)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                reactive.get_current_context().on_invalidate(lambda: self._count(self.invalidations, label))
+                start = time.perf_counter()
+                try:
+                    result = fn(*args, **kwargs)
+                except SilentException:
+                    raise  # req() stopping a render on purpose
+                except Exception:
+                    self._count(self.errors, label)
+                    raise
+                finally:
+                    self._observe(label, time.perf_counter() - start)
+                self._record_result(label, result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def observe(self, kind, name, seconds):
+        # A run timed by the caller, e.g. chart work done on the render pool
+        if self.enabled:
+            self._observe((name, kind), seconds)
+
+    def _record_result(self, label, result):
+        if isinstance(result, str):
+            self._count(self.payload_bytes, label, len(result.encode()))
+        elif hasattr(result, "model_id"):
+            # A widget: its updates are counted as they are sent
+            stats = self._session_stats()
+            if stats is not None:
+                stats.widgets[result.model_id] = label
+
+    def _observe(self, label, seconds):
+        with self._lock:
+            self.runs[label] = self.runs.get(label, 0) + 1
+            if label not in self.seconds:
+                self.seconds[label] = Histogram(TIME_BUCKETS)
+            self.seconds[label].observe(seconds)
+        if self.slow_seconds and seconds >= self.slow_seconds:
+            stats = self._session_stats()
+            session_id = None if stats is None else stats.id
+            if stats is not None:
+                stats.slow.append((time.time(), label[0], label[1], seconds))
+            logger.warning("Slow render: session %s, %s %s took %.0f ms",
+                           session_id, label[1], label[0], 1000 * seconds)
+
+    def _count(self, counter, label, n=1):
+        with self._lock:
+            counter[label] = counter.get(label, 0) + n
+
+    def _session_stats(self):
+        session = get_current_session()
+        return None if session is None else self.sessions.get(session.id)
+
+    # --- Sessions ---
+
+    def track_session(self, session):
+        if not self.enabled:
+            return
+        stats = SessionStats(session.id)
+        with self._lock:
+            self.sessions[session.id] = stats
+            self.sessions_total += 1
+
+        send = session.send_custom_message
+
+        async def counted_send(type, message):
+            if type == "shinywidgets_comm_msg" and isinstance(message, str):
+                match = COMM_ID.search(message)
+                label = match and stats.widgets.get(match.group(1))
+                if label:
+                    self._count(self.payload_bytes, label, len(message.encode()))
+            await send(type, message)
+
+        session.send_custom_message = counted_send
+        session.on_ended(lambda: self.sessions.pop(session.id, None))
+
+    def get_slow_renders(self, session_id):
+        # [(unix time, name, kind, seconds)], oldest first
+        stats = self.sessions.get(session_id)
+        return [] if stats is None else list(stats.slow)
+
+    # --- Exposition ---
+
+    def gauge(self, name, help, value):
+        # value() is read on every scrape
+        self.gauges[name] = (help, value)
+
+    def exposition(self):
+        lines = []
+
+        def family(name, type, help):
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type}")
+
+        with self._lock:
+            family("hr_output_runs_total", "counter", "Executions of a reactive calc, render function or chart effect")
+            lines += [f"hr_output_runs_total{_labels(l)} {v}" for l, v in sorted(self.runs.items())]
+            family("hr_output_invalidations_total", "counter", "Invalidations of a reactive calc, render function or chart effect")
+            lines += [f"hr_output_invalidations_total{_labels(l)} {v}" for l, v in sorted(self.invalidations.items())]
+            family("hr_output_errors_total", "counter", "Executions that raised an error")
+            lines += [f"hr_output_errors_total{_labels(l)} {v}" for l, v in sorted(self.errors.items())]
+            family("hr_output_payload_bytes_total", "counter", "Serialized bytes sent to the browser for an output")
+            lines += [f"hr_output_payload_bytes_total{_labels(l)} {v}" for l, v in sorted(self.payload_bytes.items())]
+
+            family("hr_output_seconds", "histogram", "Execution time of a reactive calc, render function or chart effect")
+            for label, hist in sorted(self.seconds.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f"hr_output_seconds_bucket{_labels(label, le=_number(bound))} {cumulative}")
+                lines.append(f"hr_output_seconds_bucket{_labels(label, le='+Inf')} {hist.count}")
+                lines.append(f"hr_output_seconds_sum{_labels(label)} {_number(hist.sum)}")
+                lines.append(f"hr_output_seconds_count{_labels(label)} {hist.count}")
+
+            family("hr_sessions_active", "gauge", "Connected sessions")
+            lines.append(f"hr_sessions_active {len(self.sessions)}")
+            family("hr_sessions_total", "counter", "Sessions started since the process started")
+            lines.append(f"hr_sessions_total {self.sessions_total}")
+
+        for name, (help, value) in sorted(self.gauges.items()):
+            family(name, "gauge", help)
+            lines.append(f"{name} {_number(value())}")
+        return "\n".join(lines) + "\n"
+
+    async def endpoint(self, request):
+        return PlainTextResponse(self.exposition(), media_type="text/plain; version=0.0.4")
+
+
+def _labels(label, **extra):
+    name, kind = label
+    pairs = {"output": name, "kind": kind, **extra}
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs.items()) + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
@@ -0,0 +1,94 @@
+# PandasBackend and DuckDBBackend must give identical answers. Runs on the
+# dataset at HR_DATA_PATH (the shipped export by default).
+
+import itertools
+import os
+
+import pandas as pd
+import pytest
+
+from backends import DuckDBBackend, PandasBackend, default_parquet_source
+from cube import compare_summaries
+from data_loader import load_dataset
+from hot_reload import HRStore
+
+DIMS = ["Department", "RecruitmentSource", "MaritalDesc", "Sex"]
+BOXES = [
+    ("EngagementSurvey", ["Employee_Name", "ManagerName", "EmpSatisfaction"]),
+    ("Absences", ["Employee_Name", "ManagerName"]),
+]
+
+# Reference values read off plotly.js boxes of the shipped export
+PLOTLY_QUARTILES = [
+    ("EngagementSurvey", "Sales", "q1", 3.205),
+    ("Absences", "Software Engineering", "q1", 3.25),
+    ("Absences", "Software Engineering", "q3", 13.75),
+    ("Absences", "IT/IS", "q3", 16.0),
+    ("Absences", "Admin Offices", "q3", 14.75),
+]
+
+
+@pytest.fixture(scope="module")
+def pandas_backend():
+    return PandasBackend(HRStore(load_dataset(), DIMS))
+
+
+@pytest.fixture(scope="module")
+def duck():
+    return DuckDBBackend(default_parquet_source())
+
+
+def selections_to_check(backend):
+    # No filter, then every single value and every pair of dimensions
+    choices = {dim: [[]] + [[v] for v in backend.choices(dim)] for dim in DIMS}
+    for a, b in itertools.combinations(DIMS, 2):
+        for va, vb in itertools.product(choices[a], choices[b]):
+            selections = {dim: [] for dim in DIMS}
+            selections[a], selections[b] = va, vb
+            yield selections
+
+
+def box_problems(got, expected, value_col):
+    if (expected is None) != (got is None):
+        return [f"box {value_col}: one side is empty"]
+    if expected is None:
+        return []
+    problems = []
+    for part in ["boxes", "outliers"]:
+        try:
+            pd.testing.assert_frame_equal(got[part], expected[part], check_dtype=False,
+                                          check_categorical=False, rtol=1e-9)
+        except AssertionError as e:
+            problems.append(f"box {value_col} {part}: {e}")
+    if got["n_outliers"] != expected["n_outliers"]:
+        problems.append(f"box {value_col}: {got['n_outliers']} vs {expected['n_outliers']} outliers")
+    return problems
+
+
+def test_choices_match(pandas_backend, duck):
+    for dim in DIMS:
+        assert duck.choices(dim) == pandas_backend.choices(dim), dim
+
+
+def test_backends_match(pandas_backend, duck):
+    mismatched = []
+    for selections in selections_to_check(pandas_backend):
+        problems = compare_summaries(duck.summarize(selections), pandas_backend.summarize(selections))
+        for value_col, hover in BOXES:
+            problems += box_problems(duck.box_stats(selections, value_col, "Department", hover, 5),
+                                     pandas_backend.box_stats(selections, value_col, "Department", hover, 5),
+                                     value_col)
+        if duck.facets(selections) != pandas_backend.facets(selections):
+            problems.append("facet counts differ")
+        if problems:
+            mismatched.append((selections, problems))
+    assert mismatched == []
+
+
+@pytest.mark.skipif("HR_DATA_PATH" in os.environ, reason="reference values are for the shipped export")
+@pytest.mark.parametrize("backend_name", ["pandas_backend", "duck"])
+@pytest.mark.parametrize("value_col, dept, stat, expected", PLOTLY_QUARTILES)
+def test_quartiles_match_plotly(request, backend_name, value_col, dept, stat, expected):
+    backend = request.getfixturevalue(backend_name)
+    boxes = backend.box_stats({dim: [] for dim in DIMS}, value_col, "Department")["boxes"]
+    assert boxes.loc[boxes["Department"] == dept, stat].item() == pytest.approx(expected, abs=1e-6)
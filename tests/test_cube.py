@@ -0,0 +1,45 @@
+# The cube must answer every filter the way the row-level path does.
+
+import itertools
+
+import pytest
+
+from cube import HRCube, check_selection
+from data_loader import load_dataset
+from filter_index import FilterIndex
+
+DIMS = ["Department", "RecruitmentSource", "MaritalDesc", "Sex"]
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = load_dataset()
+    return df, FilterIndex(df, DIMS), HRCube(df, DIMS)
+
+
+def selections_to_check(filter_index):
+    # No filter, then every single value and every pair of dimensions
+    choices = {dim: [[]] + [[v] for v in filter_index.values(dim)] for dim in DIMS}
+    for a, b in itertools.combinations(DIMS, 2):
+        for va, vb in itertools.product(choices[a], choices[b]):
+            selections = {dim: [] for dim in DIMS}
+            selections[a], selections[b] = va, vb
+            yield selections
+
+
+def test_cube_matches_rows(data):
+    df, filter_index, cube = data
+    mismatched = [(selections, problems) for selections in selections_to_check(filter_index)
+                  if (problems := check_selection(cube, df, filter_index, selections))]
+    assert mismatched == []
+
+
+def test_multi_value_selections(data):
+    df, filter_index, cube = data
+    selections = {
+        "Department": ["Production", "Sales", "IT/IS"],
+        "RecruitmentSource": ["Indeed", "LinkedIn", "Google Search"],
+        "MaritalDesc": ["Married", "Single"],
+        "Sex": [],
+    }
+    assert check_selection(cube, df, filter_index, selections) == []
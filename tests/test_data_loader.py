@@ -0,0 +1,73 @@
+# Loading the export: blank cells, streamed reads and hot-reload appends
+# must all give the frame a plain full read gives.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import data_loader
+from cube import HRCube, compare_summaries
+from data_loader import load_dataset, read_csv
+from hot_reload import DataWatcher, HRStore
+
+DIMS = ["Department", "RecruitmentSource", "MaritalDesc", "Sex"]
+
+
+@pytest.fixture(scope="module")
+def raw():
+    # The shipped export as text, exactly as written
+    return pd.read_csv(data_loader.DATA_PATH, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+
+
+def write(df, path):
+    df.to_csv(path, index=False)
+    return path
+
+
+def test_blank_numeric_cells_load_as_nan(raw, tmp_path):
+    blanked = raw.copy()
+    for col in ["Termd", "EmpSatisfaction", "Absences", "Salary"]:
+        blanked.loc[[3, 7], col] = ""
+    df = load_dataset(write(blanked, tmp_path / "hr.csv"))
+
+    full = read_csv(data_loader.DATA_PATH)
+    for col in ["Termd", "EmpSatisfaction", "Absences", "Salary"]:
+        assert df[col].dtype.kind == "f"
+        assert df[col].iloc[[3, 7]].isna().all()
+        np.testing.assert_array_equal(df[col].drop(index=[3, 7]), full[col].drop(index=[3, 7]))
+    # Complete whole-number columns are still stored as integers
+    assert full["Salary"].dtype.kind in "iu"
+
+
+def test_chunked_read_with_different_categories(raw, tmp_path, monkeypatch):
+    # Sales first: the first chunks know none of the other departments
+    ordered = raw.assign(first=raw["Department"].str.strip() != "Sales").sort_values("first", kind="stable")
+    path = write(ordered.drop(columns="first"), tmp_path / "hr.csv")
+    monkeypatch.setattr(data_loader, "CSV_CHUNK_ROWS", 25)
+
+    chunked = read_csv(path, chunked=True)
+    pd.testing.assert_frame_equal(chunked, read_csv(path), check_categorical=False)
+    for col in data_loader.CATEGORY_COLUMNS:
+        assert isinstance(chunked[col].dtype, pd.CategoricalDtype), col
+
+
+def test_append_matches_full_reload(raw, tmp_path):
+    path = tmp_path / "hr.csv"
+    write(raw.iloc[:200], path)
+    store = HRStore(load_dataset(path), DIMS)
+    watcher = DataWatcher(store, path, interval=0)
+
+    with open(path, "a", newline="") as f:
+        raw.iloc[200:].to_csv(f, index=False, header=False)
+    watcher.poll()
+    assert store.version == 1
+
+    full = load_dataset(path)
+    appended = store.current
+    pd.testing.assert_frame_equal(appended.df, full, check_categorical=False)
+    cube = HRCube(full, DIMS)
+    for selections in [{}, {"Department": ["Sales"]}, {"Sex": ["F"], "MaritalDesc": ["Single"]}]:
+        selections = {dim: selections.get(dim, []) for dim in DIMS}
+        assert compare_summaries(appended.cube.summarize(selections), cube.summarize(selections)) == []
+        np.testing.assert_array_equal(appended.filter_index.positions(selections),
+                                      HRStore(full, DIMS).current.filter_index.positions(selections))